@@ -0,0 +1,46 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.metrics import registry
+
+
+def get_token_cache_key(key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'auth-token:{digest}'
+
+
+def invalidate_token(key):
+    cache.delete(get_token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием связки токен - пользователь.
+
+    Запись в кеше живёт AUTH_TOKEN_CACHE_TTL секунд и удаляется сразу
+    при удалении токена (выход из системы), а также при любом сохранении
+    пользователя (смена пароля, деактивация). Отзыв действует во всех
+    процессах только при общем кеше default (см. foodgram.checks).
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            self.count('hit')
+            return (token.user, token)
+        self.count('miss')
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TTL)
+        return (user, token)
+
+    @staticmethod
+    def count(result):
+        registry.inc(
+            'foodgram_auth_token_cache_total',
+            'Обращения к кешу токенов аутентификации.',
+            result=result,
+        )
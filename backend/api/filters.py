@@ -1,25 +1,38 @@
-from django_filters import (FilterSet, ModelChoiceFilter,
-                            ModelMultipleChoiceFilter)
+from django.db.models import F
+from django_filters import FilterSet, ModelChoiceFilter
 from django_filters.rest_framework import filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
 from users.models import User
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe, Tag, get_tag_bit, get_tags_mask
+from .services.ingredient_search import search_ingredients
 
 
-class IngredientSearchFilter(SearchFilter):
-    """Фильтр поиска по названию игредиента."""
+def get_tag_slug_choices():
+    return [(slug, slug) for slug in Tag.get_ids_by_slug() if slug]
+
+
+class IngredientSearchFilter(BaseFilterBackend):
+    """
+    Поиск ингредиента по названию с учётом опечаток: сначала
+    совпадения с началом названия, затем похожие.
+    """
 
     search_param = 'name'
 
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search_ingredients(queryset, query)
+
 
 class RecipeFilter(FilterSet):
     """Фильтр рецептов по заданным полям."""
 
-    tags = ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_slug_choices,
+        method='get_tags'
     )
 
     is_favorited = filters.BooleanFilter(
@@ -30,6 +43,19 @@ class RecipeFilter(FilterSet):
     )
     author = ModelChoiceFilter(queryset=User.objects.all())
 
+    def get_tags(self, queryset, name, value):
+        """
+        Рецепты хотя бы с одним из тегов: проверка битовой маски
+        без соединения с таблицей тегов и без DISTINCT.
+        """
+        ids_by_slug = Tag.get_ids_by_slug()
+        tag_ids = [ids_by_slug[slug] for slug in value]
+        if not all(get_tag_bit(tag_id) for tag_id in tag_ids):
+            return queryset.filter(tags__id__in=tag_ids).distinct()
+        return queryset.alias(
+            tags_matched=F('tags_mask').bitand(get_tags_mask(tag_ids))
+        ).filter(tags_matched__gt=0)
+
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
             return queryset.filter(favorites__user=self.request.user)
@@ -0,0 +1,340 @@
+import csv
+import gc
+import json
+import logging
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (CaptureQueriesContext, override_settings,
+                               setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.services.load_testing import percentile
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+
+BUDGETS_FILE = settings.BASE_DIR / 'data' / 'benchmark_budgets.json'
+
+SEED = 75
+USERS = 60
+RECIPES = 400
+INGREDIENTS = 600
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C94C', 'dessert'),
+    ('Выпечка', '#EB5757', 'bakery'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер количества SQL-запросов и задержки основных эндпоинтов '
+        'на тестовой базе SQLite со сравнением с сохранёнными бюджетами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=30,
+            help='Количество замеров на каждый сценарий.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Количество прогревочных запросов на каждый сценарий.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.0,
+            help='Допустимый рост p50/p95 относительно базовой линии.'
+        )
+        parser.add_argument(
+            '--min-slack-ms', type=float, default=5.0,
+            help='Абсолютный запас по задержке, мс.'
+        )
+        parser.add_argument(
+            '--only', default='',
+            help='Запускать только сценарии, в названии которых есть строка.'
+        )
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Записать полученные значения как новые бюджеты.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Замеры выполняются только на SQLite (запустите с DEBUG=True).'
+            )
+        logging.getLogger('foodgram.performance').setLevel(logging.ERROR)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        # Ограничения частоты остаются включёнными, чтобы учитывать
+        # их накладные расходы, но не должны срабатывать.
+        rates = dict.fromkeys(
+            settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], '1000000/s'
+        )
+        try:
+            self.seed()
+            with override_settings(REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates
+            }):
+                results = self.run_scenarios(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        if options['update']:
+            self.save_budgets(results, options['only'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Бюджеты записаны в {BUDGETS_FILE}.'
+            ))
+            return
+        failures = self.compare(results, options)
+        if failures:
+            raise CommandError(
+                'Превышены бюджеты:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены.'))
+
+    def seed(self):
+        rng = random.Random(SEED)
+        with open(
+            settings.BASE_DIR / 'data' / 'ingredients.csv', encoding='utf-8'
+        ) as file:
+            rows = list(zip(range(INGREDIENTS), csv.reader(file)))
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=unit)
+                for _, (name, unit) in rows
+            ),
+            ignore_conflicts=True
+        )
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in TAGS
+        ]
+        User.objects.bulk_create(
+            User(
+                email=f'user{number}@foodgram.ru',
+                username=f'user{number}',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            for number in range(USERS)
+        )
+        users = list(User.objects.order_by('pk'))
+        authors = users[:USERS // 3]
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=rng.choice(authors),
+                name=f'Рецепт {number}',
+                text='Описание рецепта. ' * 20,
+                image='recipes/images/benchmark.png',
+                cooking_time=rng.randint(5, 120),
+            )
+            for number in range(RECIPES)
+        )
+        recipes = list(Recipe.objects.values_list('id', flat=True))
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe, tag_id=tag.id)
+            for recipe in recipes
+            for tag in rng.sample(tags, rng.randint(1, 3))
+        )
+        Recipe.rebuild_tags_masks(recipes)
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe, ingredient_id=ingredient,
+                amount=rng.randint(1, 500)
+            )
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients, rng.randint(3, 12))
+        )
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe_id=recipe)
+                for user in users
+                for recipe in rng.sample(recipes, rng.randint(0, 20))
+            )
+        Subscription.objects.bulk_create(
+            Subscription(user=user, author=author)
+            for user in users
+            for author in rng.sample(authors, rng.randint(0, 8))
+            if author != user
+        )
+        self.reader = users[-1]
+        Favorite.objects.filter(user=self.reader).delete()
+        ShoppingCart.objects.filter(user=self.reader).delete()
+        Favorite.objects.bulk_create(
+            Favorite(user=self.reader, recipe_id=recipe)
+            for recipe in recipes[:30]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=self.reader, recipe_id=recipe)
+            for recipe in recipes[:10]
+        )
+        Subscription.objects.filter(user=self.reader).delete()
+        Subscription.objects.bulk_create(
+            Subscription(user=self.reader, author=author)
+            for author in authors[:10]
+        )
+        self.author = authors[0]
+        self.recipe = Recipe.objects.filter(author=self.author).first()
+        self.toggle_recipe = recipes[-1]
+        self.tags = tags
+
+    def get_scenarios(self):
+        first, second = self.tags[0].slug, self.tags[1].slug
+        author = self.author.id
+        return {
+            'recipes-list': [('get', '/api/recipes/')],
+            'recipes-list-page': [('get', '/api/recipes/?page=3&limit=12')],
+            'recipes-list-cards': [(
+                'get', '/api/recipes/?fields=id,name,image,cooking_time'
+            )],
+            'recipes-list-collapsed': [('get', '/api/recipes/?expand=')],
+            'recipes-list-tag': [('get', f'/api/recipes/?tags={first}')],
+            'recipes-list-tags': [
+                ('get', f'/api/recipes/?tags={first}&tags={second}')
+            ],
+            'recipes-list-author': [('get', f'/api/recipes/?author={author}')],
+            'recipes-list-favorited': [
+                ('get', '/api/recipes/?is_favorited=1')
+            ],
+            'recipes-list-cart': [
+                ('get', '/api/recipes/?is_in_shopping_cart=1')
+            ],
+            'recipes-list-favorited-tag': [
+                ('get', f'/api/recipes/?is_favorited=1&tags={first}')
+            ],
+            'recipes-list-author-tags': [(
+                'get',
+                f'/api/recipes/?author={author}&tags={first}&tags={second}'
+            )],
+            'recipes-detail': [('get', f'/api/recipes/{self.recipe.id}/')],
+            'recipes-multi-get': [(
+                'get', '/api/recipes/?ids=' + ','.join(
+                    str(pk) for pk in range(1, RECIPES, RECIPES // 20)
+                )
+            )],
+            'recipes-facets': [
+                ('get', f'/api/recipes/facets/?author={author}&tags={first}')
+            ],
+            'recipes-facets-favorited': [
+                ('get', '/api/recipes/facets/?is_favorited=1')
+            ],
+            'users-list': [('get', '/api/users/')],
+            'users-me': [('get', '/api/users/me/')],
+            'users-subscriptions': [
+                ('get', '/api/users/subscriptions/?recipes_limit=3')
+            ],
+            'ingredients-search': [('get', '/api/ingredients/?name=ка')],
+            'tags-list': [('get', '/api/tags/')],
+            'favorite-toggle': [
+                ('post', f'/api/recipes/{self.toggle_recipe}/favorite/'),
+                ('delete', f'/api/recipes/{self.toggle_recipe}/favorite/'),
+            ],
+            'shopping-cart-toggle': [
+                ('post', f'/api/recipes/{self.toggle_recipe}/shopping_cart/'),
+                (
+                    'delete',
+                    f'/api/recipes/{self.toggle_recipe}/shopping_cart/'
+                ),
+            ],
+            'download-shopping-cart': [
+                ('get', '/api/recipes/download_shopping_cart/')
+            ],
+        }
+
+    def run_scenarios(self, options):
+        token = Token.objects.create(user=self.reader)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        results = {}
+        for name, steps in self.get_scenarios().items():
+            if options['only'] not in name:
+                continue
+            for _ in range(options['warmup']):
+                self.run_steps(client, name, steps)
+            timings = []
+            gc.collect()
+            gc.disable()
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    self.run_steps(client, name, steps)
+                    timings.append((time.perf_counter() - started) * 1000)
+            gc.enable()
+            results[name] = {
+                'queries': len(queries),
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+            }
+            self.stdout.write(
+                f'{name:<28} queries={len(queries):<4} '
+                f'p50={results[name]["p50_ms"]:>8.2f} ms '
+                f'p95={results[name]["p95_ms"]:>8.2f} ms'
+            )
+        return results
+
+    @staticmethod
+    def run_steps(client, name, steps):
+        for method, url in steps:
+            response = getattr(client, method)(url)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{name}: {method.upper()} {url} вернул '
+                    f'{response.status_code}.'
+                )
+
+    @staticmethod
+    def load_budgets():
+        if not BUDGETS_FILE.exists():
+            return {}
+        with open(BUDGETS_FILE, encoding='utf-8') as file:
+            return json.load(file)
+
+    def save_budgets(self, results, only):
+        budgets = self.load_budgets() if only else {}
+        budgets.update(results)
+        with open(BUDGETS_FILE, 'w', encoding='utf-8') as file:
+            json.dump(budgets, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+    def compare(self, results, options):
+        budgets = self.load_budgets()
+        failures = []
+        for name, result in results.items():
+            budget = budgets.get(name)
+            if budget is None:
+                failures.append(f'{name}: нет сохранённого бюджета.')
+                continue
+            if result['queries'] > budget['queries']:
+                failures.append(
+                    f'{name}: SQL-запросов {result["queries"]}, '
+                    f'бюджет {budget["queries"]}.'
+                )
+            elif result['queries'] < budget['queries']:
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: SQL-запросов меньше бюджета '
+                    f'({result["queries"]} < {budget["queries"]}), '
+                    f'обновите бюджеты через --update.'
+                ))
+            for key in ('p50_ms', 'p95_ms'):
+                limit = max(
+                    budget[key] * (1 + options['tolerance']),
+                    budget[key] + options['min_slack_ms'],
+                )
+                if result[key] > limit:
+                    failures.append(
+                        f'{name}: {key} {result[key]:.2f}, '
+                        f'допустимо до {limit:.2f}.'
+                    )
+        return failures
@@ -0,0 +1,112 @@
+import io
+import timeit
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+
+PAGE_SIZES = (6, 50, 200, 1000)
+TAGS = (
+    OrderedDict(id=1, name='Завтрак', color='#E26C2D', slug='breakfast'),
+    OrderedDict(id=2, name='Обед', color='#49B64E', slug='lunch'),
+)
+INGREDIENTS = (
+    ('абрикосовое варенье', 'г'),
+    ('картофель', 'шт.'),
+    ('молоко', 'мл'),
+    ('соль', 'по вкусу'),
+    ('мука пшеничная', 'стакан'),
+    ('яйца куриные', 'шт.'),
+    ('сливочное масло', 'г'),
+    ('сахар', 'ст. л.'),
+)
+
+
+def make_recipe(number):
+    return OrderedDict(
+        id=number,
+        tags=list(TAGS[:number % 2 + 1]),
+        author=OrderedDict(
+            email=f'cook{number}@foodgram.ru',
+            id=number % 97,
+            username=f'cook{number}',
+            first_name='Максим',
+            last_name='Уколов',
+            is_subscribed=bool(number % 3),
+        ),
+        ingredients=[
+            OrderedDict(
+                id=index, name=name, measurement_unit=unit,
+                amount=(number * index) % 500 + 1
+            )
+            for index, (name, unit) in enumerate(INGREDIENTS, start=1)
+        ],
+        is_favorited=bool(number % 2),
+        is_in_shopping_cart=False,
+        name=f'Рецепт «Пирог» №{number}',
+        image=f'http://foodgram.ru/media/recipes/images/{number}.jpg',
+        text='Смешать «муку» и "молоко"\tдобавить\\яйца.\u2028' * 10,
+        cooking_time=number % 180 + 1,
+    )
+
+
+def make_page(size):
+    return OrderedDict(
+        count=size * 10,
+        next='http://foodgram.ru/api/recipes/?page=2',
+        previous=None,
+        results=[make_recipe(number) for number in range(size)],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение скорости и побайтового результата стандартного '
+        'и ускоренного JSON-рендерера и парсера на страницах рецептов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен: ускоренные классы используют '
+                'стандартную реализацию.'
+            ))
+        repeat = options['repeat']
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        for size in PAGE_SIZES:
+            page = make_page(size)
+            expected = standard.render(page)
+            if fast.render(page) != expected:
+                raise CommandError(
+                    f'Результат рендеринга страницы из {size} рецептов '
+                    'отличается от стандартного.'
+                )
+            parsed = JSONParser().parse(io.BytesIO(expected))
+            if FastJSONParser().parse(io.BytesIO(expected)) != parsed:
+                raise CommandError(
+                    f'Результат разбора страницы из {size} рецептов '
+                    'отличается от стандартного.'
+                )
+            timings = [
+                timeit.timeit(action, number=repeat) / repeat * 1000
+                for action in (
+                    lambda: standard.render(page),
+                    lambda: fast.render(page),
+                    lambda: JSONParser().parse(io.BytesIO(expected)),
+                    lambda: FastJSONParser().parse(io.BytesIO(expected)),
+                )
+            ]
+            self.stdout.write(
+                f'{size:>5} рецептов, {len(expected) / 1024:>7.1f} КБ: '
+                f'рендеринг {timings[0]:.3f} -> {timings[1]:.3f} мс, '
+                f'разбор {timings[2]:.3f} -> {timings[3]:.3f} мс'
+            )
@@ -0,0 +1,80 @@
+import logging
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases, teardown_test_environment)
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.management.commands.benchmark_endpoints import \
+    Command as EndpointsBenchmark
+from api.serializers import (BriefRecipeSerializer, IngredientSerializer,
+                             TagSerializer)
+from api.services.fast_serializers import (BriefRecipeValuesSerializer,
+                                           IngredientValuesSerializer,
+                                           TagValuesSerializer)
+from recipes.models import Ingredient, Recipe, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер стоимости сериализации одной строки быстрыми '
+        'сериализаторами на values() и ModelSerializer. Совпадение '
+        'ответов проверяют тесты api.tests.test_serializers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Замеры выполняются только на SQLite (запустите с DEBUG=True).'
+            )
+        logging.getLogger('foodgram.performance').setLevel(logging.ERROR)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            EndpointsBenchmark().seed()
+            self.compare(options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def compare(self, repeat):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        context = {'request': request}
+        pairs = (
+            (
+                'tags', Tag.objects.all(),
+                TagSerializer, TagValuesSerializer,
+            ),
+            (
+                'ingredients', Ingredient.objects.all(),
+                IngredientSerializer, IngredientValuesSerializer,
+            ),
+            (
+                'recipes (brief)', Recipe.objects.all(),
+                BriefRecipeSerializer, BriefRecipeValuesSerializer,
+            ),
+        )
+        for name, queryset, serializer_class, fast_class in pairs:
+            rows = queryset.count()
+            timings = [
+                timeit.timeit(action, number=repeat) / repeat / rows * 1e6
+                for action in (
+                    lambda: serializer_class(
+                        queryset.all(), many=True, context=context
+                    ).data,
+                    lambda: fast_class(context=context).serialize(
+                        queryset.all()
+                    ),
+                )
+            ]
+            self.stdout.write(
+                f'{name:<16} {rows:>5} строк: '
+                f'{timings[0]:.2f} -> {timings[1]:.2f} мкс на строку '
+                f'(x{timings[0] / timings[1]:.1f})'
+            )
@@ -0,0 +1,184 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.load_testing import (HttpClient, get_account,
+                                       load_collection, run_load)
+
+COLLECTION = (
+    settings.BASE_DIR.parent / 'postman-collection'
+    / 'diploma.postman_collection.json'
+)
+
+# Сценарий - вес и папки коллекции, запросы которых выполняются
+# по порядку. Папки с негативными проверками не используются.
+SCENARIOS = {
+    'recipes-read': (40, ['recipes/get_recipes']),
+    'recipes-filters': (
+        10, ['recipe_filters_for_favorite_and_shopping_cart']
+    ),
+    'ingredients-read': (15, ['ingredients/get_ingradients']),
+    'tags-read': (10, ['tags/get_tags_info']),
+    'users-read': (10, ['users/get_user_info']),
+    'subscriptions-read': (5, ['subscriptions/get_subscriptions']),
+    'favorite-toggle': (
+        5, ['favorite/add_to_favorite', 'delete_requests/favorite']
+    ),
+    'shopping-cart': (5, [
+        'shopping_cart/add_to_shopping_cart',
+        'shopping_cart/download_shopping_cart',
+        'delete_requests/shopping_cart',
+    ]),
+}
+RECIPE_VARIABLES = (
+    'recipeId', 'firstRecipeId', 'secondRecipeId', 'thirdRecipeId',
+    'fourthRecipeId', 'fifthRecipeId',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон запросов из коллекции Postman: взвешенные '
+        'сценарии, параллельные виртуальные пользователи, пропускная '
+        'способность, доля ошибок и перцентили задержки по эндпоинтам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--collection', default=str(COLLECTION))
+        parser.add_argument(
+            '--users', type=int, default=20,
+            help='Количество виртуальных пользователей (потоков).'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30,
+            help='Длительность прогона, с.'
+        )
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument(
+            '--weight', action='append', default=[], metavar='NAME=N',
+            help='Вес сценария; 0 отключает сценарий.'
+        )
+        parser.add_argument(
+            '--password', default='LoadTest-Pa$$word',
+            help='Пароль учётных записей виртуальных пользователей.'
+        )
+        parser.add_argument(
+            '--json', help='Файл для записи результатов в формате JSON.'
+        )
+        parser.add_argument(
+            '--list', action='store_true',
+            help='Показать сценарии и их запросы.'
+        )
+
+    def handle(self, *args, **options):
+        requests, self.collection_variables = load_collection(
+            options['collection']
+        )
+        scenarios, weights = self.get_scenarios(requests, options['weight'])
+        if options['list']:
+            for name, scenario in scenarios.items():
+                self.stdout.write(f'{name} (вес {weights[name]}):')
+                for request in scenario:
+                    self.stdout.write(f'  {request.endpoint}')
+            return
+        self.client = HttpClient(options['base_url'], options['timeout'])
+        self.prepare(options['users'], options['password'])
+        self.stdout.write(
+            f'Нагрузка: {options["users"]} пользователей, '
+            f'{options["duration"]:.0f} с, {options["base_url"]}'
+        )
+        report = run_load(
+            self.client, scenarios, weights, self.make_variables,
+            options['users'], options['duration'],
+        )
+        self.print_report(report)
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as file:
+                json.dump(list(report.rows()), file, indent=2)
+
+    @staticmethod
+    def get_scenarios(requests, overrides):
+        weights = {name: weight for name, (weight, _) in SCENARIOS.items()}
+        for override in overrides:
+            name, _, weight = override.partition('=')
+            if name not in weights or not weight.isdigit():
+                raise CommandError(
+                    f'Неверный вес {override!r}; сценарии: '
+                    f'{", ".join(SCENARIOS)}.'
+                )
+            weights[name] = int(weight)
+        scenarios = {
+            name: [
+                request
+                for folder in folders
+                for request in requests
+                if request.folder == folder
+            ]
+            for name, (_, folders) in SCENARIOS.items()
+            if weights[name]
+        }
+        if not scenarios:
+            raise CommandError('Все сценарии отключены.')
+        return scenarios, weights
+
+    def prepare(self, users, password):
+        """
+        Справочные данные с сервера и учётные записи виртуальных
+        пользователей (создаются при первом запуске).
+        """
+        _, tags = self.client.json('GET', '/api/tags/')
+        _, ingredients = self.client.json('GET', '/api/ingredients/')
+        _, recipes = self.client.json('GET', '/api/recipes/?limit=100')
+        if not tags or not ingredients or not recipes or not recipes.get(
+            'results'
+        ):
+            raise CommandError(
+                f'Сервер {self.client.base_url} недоступен или в базе нет '
+                'тегов, ингредиентов и рецептов.'
+            )
+        self.tags = tags
+        self.ingredients = ingredients
+        self.recipe_ids = [recipe['id'] for recipe in recipes['results']]
+        try:
+            self.accounts = [
+                get_account(self.client, number, password)
+                for number in range(users)
+            ]
+        except ValueError as error:
+            raise CommandError(str(error))
+
+    def make_variables(self, number):
+        """Переменные коллекции для виртуального пользователя."""
+        rng = random.Random(number)
+        accounts = self.accounts
+        variables = dict(self.collection_variables)
+        for offset, prefix in enumerate(('user', 'secondUser', 'thirdUser')):
+            user_id, token = accounts[(number + offset) % len(accounts)]
+            variables[f'{prefix}Id'] = user_id
+            variables[f'{prefix}Token'] = token
+        for index, prefix in enumerate(('first', 'second', 'third')):
+            tag = self.tags[index % len(self.tags)]
+            variables[f'{prefix}TagId'] = tag['id']
+            variables[f'{prefix}TagSlug'] = tag['slug']
+        ingredient = rng.choice(self.ingredients)
+        variables['firstIndredientId'] = ingredient['id']
+        variables['ingredientNameFirstLatter'] = ingredient['name'][0]
+        for name in RECIPE_VARIABLES:
+            variables[name] = rng.choice(self.recipe_ids)
+        return variables
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"Эндпоинт":<58} {"запросов":>8} {"в сек.":>7} '
+            f'{"ошибок":>7} {"p50":>8} {"p95":>8} {"p99":>8}'
+        )
+        for row in report.rows():
+            self.stdout.write(
+                f'{row["endpoint"][:58]:<58} {row["requests"]:>8} '
+                f'{row["rps"]:>7.1f} {row["error_rate"]:>7.1%} '
+                f'{row["p50_ms"]:>8.1f} {row["p95_ms"]:>8.1f} '
+                f'{row["p99_ms"]:>8.1f}'
+            )
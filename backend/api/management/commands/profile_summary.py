@@ -0,0 +1,86 @@
+import glob
+import io
+import os
+import pstats
+import tracemalloc
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.middleware import make_profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка по профилям запросов, записанным ProfilingMiddleware: '
+        'самые затратные функции и места выделения памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=settings.PROFILING_DIR,
+            help='Каталог с профилями (по умолчанию PROFILING_DIR).'
+        )
+        parser.add_argument(
+            '--view', default='',
+            help='Только профили представлений, в имени которых есть строка.'
+        )
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=('cumulative', 'tottime', 'ncalls'),
+        )
+        parser.add_argument(
+            '--make-token', choices=('cpu', 'memory'),
+            help='Вывести подписанное значение заголовка X-Profile.'
+        )
+
+    def handle(self, *args, **options):
+        if options['make_token']:
+            self.stdout.write(make_profile_token(
+                memory=options['make_token'] == 'memory'
+            ))
+            return
+        if not options['dir']:
+            raise CommandError(
+                'Укажите каталог через --dir или PROFILING_DIR.'
+            )
+        profiles = self.find(options, 'prof')
+        if not profiles:
+            raise CommandError('Профили не найдены.')
+        output = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=output)
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(f'Профилей: {len(profiles)}')
+        self.stdout.write(output.getvalue())
+        snapshots = self.find(options, 'tracemalloc')
+        if snapshots:
+            self.summarize_memory(snapshots, options['limit'])
+
+    @staticmethod
+    def find(options, extension):
+        return sorted(
+            path
+            for path in glob.glob(
+                os.path.join(options['dir'], f'*.{extension}')
+            )
+            if options['view'] in os.path.basename(path)
+        )
+
+    def summarize_memory(self, snapshots, limit):
+        """Суммарный объём выделенной памяти по строкам кода."""
+        sizes = Counter()
+        counts = Counter()
+        for path in snapshots:
+            for stat in tracemalloc.Snapshot.load(path).statistics('lineno'):
+                frame = stat.traceback[0]
+                location = f'{frame.filename}:{frame.lineno}'
+                sizes[location] += stat.size
+                counts[location] += stat.count
+        self.stdout.write(f'Снимков памяти: {len(snapshots)}')
+        for location, size in sizes.most_common(limit):
+            self.stdout.write(
+                f'{size / 1024:>10.1f} КБ {counts[location]:>8} блоков  '
+                f'{location}'
+            )
@@ -0,0 +1,51 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с тем же побайтовым результатом, что и
+    стандартный JSONRenderer (кириллица без \\u-экранирования, компактные
+    разделители, экранирование U+2028 и U+2029).
+
+    Без установленного orjson, при запросе отступов или невозможности
+    сериализации используется стандартный рендерер.
+
+    Отличия касаются только float, которых нет в ответах API (количества
+    и время - целые): отрицательный порядок пишется без ведущего нуля
+    (1e-7 вместо 1e-07), а NaN и бесконечность выводятся как null
+    вместо ошибки ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=(
+                    orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
@@ -3,14 +3,27 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
 from users.models import Subscription, User
+from .services.fast_serializers import BriefRecipeValuesSerializer
 from .services.image_decoder import Base64ImageField
 from foodgram.constants import (MIN_COOKING_TIME_IN_MINUTES,
                                 MIN_INGREDIENTS_AMOUNT)
+from foodgram.metrics import serializer_timer
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, Tag, get_tags_mask)
+from outbox.models import ChangeEvent
+from outbox.recorder import make_event, record_many
+from recipes.utils import bulk_create_returning_ids
 
 
-class CustomUserSerializer(UserSerializer):
+class TimedSerializerMixin:
+    """Учёт времени сериализации в метриках запроса."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class CustomUserSerializer(TimedSerializerMixin, UserSerializer):
     """Сериализатор для кастомной модели User."""
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -29,13 +42,21 @@ class CustomUserSerializer(UserSerializer):
     def get_is_subscribed(self, obj):
         """Проверка подписки текущего пользователя на автора."""
         request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
+        if (
+            request is None
+            or request.user.is_anonymous
+            or request.user.pk == obj.pk
+        ):
             return False
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
         return Subscription.objects.filter(
             user=request.user, author=obj).exists()
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     """Сериализатор для работы с моделью ингредиентов."""
 
     class Meta:
@@ -61,7 +82,7 @@ class IngredientCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с моделью тегов."""
 
     class Meta:
@@ -88,8 +109,25 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для получения информации о рецепте."""
+class IngredientAmountSerializer(serializers.ModelSerializer):
+    """Ингредиент рецепта без раскрытия: id и количество."""
+
+    id = serializers.IntegerField(source='ingredient_id', read_only=True)
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('id', 'amount')
+
+
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Сериализатор для получения информации о рецепте.
+
+    В контексте можно передать fields - выводимые поля и expand -
+    раскрываемые связи; нераскрытые связи выводятся как id.
+    """
+
+    EXPANDABLE = ('author', 'tags', 'ingredients')
 
     tags = TagSerializer(read_only=True, many=True)
     author = CustomUserSerializer(read_only=True)
@@ -116,21 +154,49 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        expand = self.context.get('expand')
+        if expand is None:
+            return
+        collapsed = {
+            'author': lambda: serializers.PrimaryKeyRelatedField(
+                read_only=True
+            ),
+            'tags': lambda: serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True
+            ),
+            'ingredients': lambda: IngredientAmountSerializer(
+                many=True, source='recipe_ingredients'
+            ),
+        }
+        for name in set(self.EXPANDABLE) - set(expand):
+            if name in self.fields:
+                self.fields[name] = collapsed[name]()
+
     def get_is_favorited(self, obj):
         request = self.context.get('request')
-        return (
-            request.user.is_authenticated
-            and Favorite.objects.filter(user=request.user, recipe=obj).exists()
-        )
+        if request is None or request.user.is_anonymous:
+            return False
+        is_favorited = getattr(obj, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
+        return Favorite.objects.filter(user=request.user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
-        return (
-            request.user.is_authenticated
-            and ShoppingCart.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
-        )
+        if request is None or request.user.is_anonymous:
+            return False
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
+        return ShoppingCart.objects.filter(
+            user=request.user, recipe=obj
+        ).exists()
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -215,6 +281,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                 )
             )
         IngredientRecipe.objects.bulk_create(items)
+        record_many([make_event(item, ChangeEvent.CREATE) for item in items])
 
     def create(self, validated_data):
         author = self.context['request'].user
@@ -228,12 +295,10 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('recipe_ingredients')
         tags = validated_data.pop('tags')
-        instance.tags.clear()
         instance.tags.set(tags)
         IngredientRecipe.objects.filter(recipe=instance).delete()
         super().update(instance, validated_data)
         self.create_ingredients(ingredients, instance)
-        instance.save()
         return instance
 
     def to_representation(self, instance):
@@ -244,6 +309,101 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ).data
 
 
+def get_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecipeBulkItemSerializer(RecipeCreateSerializer):
+    """
+    Рецепт в пакетной загрузке. Ингредиенты и теги проверяются
+    по множествам существующих id из контекста (ingredient_ids,
+    tag_ids), которые выбираются одним запросом на весь пакет.
+    """
+
+    tags = serializers.ListField(child=serializers.IntegerField())
+
+    @staticmethod
+    def get_referenced_ids(items):
+        """id ингредиентов и тегов, упомянутых в пакете."""
+        ingredient_ids, tag_ids = set(), set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            ingredients = item.get('ingredients')
+            if isinstance(ingredients, list):
+                ingredient_ids.update(
+                    get_int(ingredient.get('id')) for ingredient in ingredients
+                    if isinstance(ingredient, dict)
+                )
+            tags = item.get('tags')
+            if isinstance(tags, list):
+                tag_ids.update(get_int(tag) for tag in tags)
+        ingredient_ids.discard(None)
+        tag_ids.discard(None)
+        return ingredient_ids, tag_ids
+
+    def validate_ingredients(self, ingredients):
+        ids = [item['id'] for item in ingredients]
+        if not set(ids) <= self.context['ingredient_ids']:
+            raise serializers.ValidationError('Ингредиент не существует.')
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                'Ингредиенты должны быть уникальными.'
+            )
+        return ingredients
+
+    def validate_tags(self, tags):
+        missing = [tag for tag in tags if tag not in self.context['tag_ids']]
+        if missing:
+            raise serializers.ValidationError(
+                serializers.PrimaryKeyRelatedField.default_error_messages[
+                    'does_not_exist'
+                ].format(pk_value=missing[0])
+            )
+        return super().validate_tags(tags)
+
+    @staticmethod
+    def bulk_create(items, author):
+        """
+        Вставка проверенных рецептов, их тегов и ингредиентов тремя
+        пакетными запросами и событий журнала изменений - четвёртым;
+        вызывать внутри транзакции и explicit_recording().
+        """
+        recipes = bulk_create_returning_ids(Recipe, [
+            Recipe(
+                author=author,
+                name=item['name'],
+                text=item['text'],
+                cooking_time=item['cooking_time'],
+                image=item['image'],
+                tags_mask=get_tags_mask(item['tags']),
+            )
+            for item in items
+        ])
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, item in zip(recipes, items)
+            for tag_id in item['tags']
+        )
+        ingredients = IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe.pk,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount'],
+            )
+            for recipe, item in zip(recipes, items)
+            for ingredient in item['recipe_ingredients']
+        )
+        record_many(
+            [make_event(recipe, ChangeEvent.CREATE) for recipe in recipes]
+            + [make_event(item, ChangeEvent.CREATE) for item in ingredients]
+        )
+        return recipes
+
+
 class BriefRecipeSerializer(RecipeSerializer):
     """Сериализатор для работы с краткой формой рецепта."""
 
@@ -282,9 +442,9 @@ class SubscriptionSerializer(CustomUserSerializer):
             recipes = obj.recipes.all()
         if recipes_limit:
             recipes = obj.recipes.all()[: int(recipes_limit)]
-        return BriefRecipeSerializer(
-            recipes, many=True, context={'request': request}
-        ).data
+        return BriefRecipeValuesSerializer(
+            context={'request': request}
+        ).serialize(recipes)
 
 
 class SubscriptionCreateSerializer(serializers.ModelSerializer):
@@ -311,7 +471,8 @@ class SubscriptionCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class FavoriteShoppingCartBaseModelSerializer(serializers.ModelSerializer):
+class FavoriteShoppingCartBaseModelSerializer(TimedSerializerMixin,
+                                              serializers.ModelSerializer):
     """Базовый сериализатор для избранных рецептов и списка покупок."""
 
     class Meta:
@@ -0,0 +1,137 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Value
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+# Данные, которые выводятся в рецепте, но не меняют его updated_at.
+RELATED_VERSIONS = ('tags', 'ingredients', 'users')
+
+
+def make_etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def get_version_key(name):
+    return f'version:{name}'
+
+
+def bump_version(name):
+    """
+    Отметка изменения данных name. Версия - время изменения
+    в наносекундах, поэтому после вытеснения ключа из кеша она
+    не повторяет прежние значения.
+    """
+    cache.set(get_version_key(name), time.time_ns(), None)
+
+
+def get_versions(*names):
+    """Версии данных одним обращением к кешу; недостающие создаются."""
+    keys = [get_version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def get_user_state(user):
+    """
+    Отпечаток избранного, списка покупок и подписок пользователя
+    (количество и последний id) одним запросом.
+    """
+    if user.is_anonymous:
+        return ()
+    querysets = [
+        model.objects.filter(user=user).order_by().values('user').annotate(
+            kind=Value(kind), total=Count('pk'), last=Max('pk')
+        ).values_list('kind', 'total', 'last')
+        for kind, model in enumerate((Favorite, ShoppingCart, Subscription))
+    ]
+    return tuple(sorted(querysets[0].union(*querysets[1:], all=True)))
+
+
+def get_recipe_detail_validators(request, pk):
+    """
+    ETag и Last-Modified рецепта без его сериализации: по времени
+    изменения рецепта и версиям тегов, ингредиентов и пользователей.
+    """
+    queryset = Recipe.objects.filter(pk=pk)
+    user = request.user
+    fields = ['updated_at']
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_subscribed=Exists(
+                Subscription.objects.filter(
+                    user=user, author=OuterRef('author')
+                )
+            ),
+        )
+        fields += ['is_favorited', 'is_in_shopping_cart', 'is_subscribed']
+    state = queryset.values_list(*fields).first()
+    if state is None:
+        return None, None
+    versions = get_versions(*RELATED_VERSIONS)
+    etag = make_etag(
+        'recipe', request.get_full_path(), user.pk,
+        request.accepted_renderer.format, state, versions
+    )
+    last_modified = None
+    if user.is_anonymous:
+        last_modified = int(max(
+            state[0].timestamp(), *(version / 1e9 for version in versions)
+        ))
+    return etag, last_modified
+
+
+def get_recipe_list_validators(request, queryset):
+    """ETag страницы списка рецептов по агрегатам отфильтрованной выборки."""
+    state = queryset.order_by().aggregate(
+        total=Count('pk'), last_updated=Max('updated_at')
+    )
+    return make_etag(
+        'recipes',
+        request.get_full_path(),
+        request.user.pk,
+        request.accepted_renderer.format,
+        state['total'],
+        state['last_updated'],
+        get_user_state(request.user),
+        get_versions(*RELATED_VERSIONS),
+    ), None
+
+
+def conditional_response(request, validators, get_response):
+    """
+    Ответ 304 при совпадении валидаторов, иначе полный ответ
+    с заголовками ETag и Last-Modified.
+    """
+    etag, last_modified = validators
+    if etag is not None:
+        etag = quote_etag(etag)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+    return response
@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+
+from foodgram.db_router import replica_reads
+from recipes.models import Tag
+from .conditional import bump_version, get_user_state, get_versions
+from .fast_serializers import TagValuesSerializer
+
+# Параметры, не влияющие на счётчики: теги считаются без учёта
+# выбранных тегов, пагинация не меняет выборку.
+IGNORED_PARAMS = ('tags', 'page', 'limit', 'fields', 'expand', 'format')
+USER_PARAMS = ('is_favorited', 'is_in_shopping_cart')
+
+
+class TagFacetValuesSerializer(TagValuesSerializer):
+    fields = TagValuesSerializer.fields + (
+        ('recipes_count', 'recipes_count'),
+    )
+
+
+def reset_facets():
+    """
+    Сброс счётчиков при изменении рецептов и тегов: новая версия
+    в общем кеше видна всем процессам.
+    """
+    bump_version('facets')
+
+
+def is_recent(version):
+    """
+    Версия моложе REPLICA_PIN_SECONDS: реплики могут ещё не получить
+    изменения, из-за которых она сменилась.
+    """
+    return time.time_ns() - version < settings.REPLICA_PIN_SECONDS * 10**9
+
+
+def get_signature(request):
+    """
+    Подпись фильтра: параметры запроса без тегов и пагинации и,
+    если выборка зависит от пользователя, его id.
+    """
+    params = sorted(
+        (name, tuple(sorted(values)))
+        for name, values in request.query_params.lists()
+        if name not in IGNORED_PARAMS
+    )
+    user = request.user
+    user_id = None
+    if user.is_authenticated and any(
+        request.query_params.get(name) not in (None, '', '0', 'false')
+        for name in USER_PARAMS
+    ):
+        user_id = user.pk
+    return params, user_id
+
+
+def get_tag_counts(queryset):
+    """Количество рецептов выборки по каждому тегу одним GROUP BY."""
+    return TagFacetValuesSerializer().serialize(
+        Tag.objects.annotate(recipes_count=Count(
+            'recipe', filter=Q(recipe__in=queryset.values('pk'))
+        )).order_by('name')
+    )
+
+
+def get_cached_tag_counts(request, get_queryset):
+    """
+    Счётчики по тегам из кеша. Ключ включает версию, которая растёт
+    при изменении рецептов и тегов, а для фильтров по избранному
+    и корзине - ещё и их отпечаток, поэтому устаревшие записи
+    не удаляются, а просто перестают читаться.
+
+    Сразу после смены версии счётчики считаются по основной базе,
+    чтобы под новой версией не закешировать данные отстающей реплики.
+    """
+    params, user_id = get_signature(request)
+    state = get_user_state(request.user) if user_id is not None else ()
+    version, = get_versions('facets')
+    digest = hashlib.md5(repr((
+        params, user_id, state, version
+    )).encode()).hexdigest()
+
+    def compute():
+        if is_recent(version):
+            with replica_reads(False):
+                return get_tag_counts(get_queryset())
+        return get_tag_counts(get_queryset())
+
+    return caches['tiered'].get_or_set(
+        f'recipe-facets:{digest}', compute, settings.RECIPE_FACETS_CACHE_TTL,
+    )
@@ -0,0 +1,91 @@
+from django.core.files.storage import default_storage
+
+from foodgram.metrics import serializer_timer
+from recipes.models import Ingredient, Recipe, Tag
+
+
+class ValuesSerializer:
+    """
+    Сериализатор только для чтения, собирающий ответ из строк
+    values_list() без создания экземпляров моделей и полей DRF.
+
+    fields - пары (имя в ответе, поле модели); для полей, которым
+    нужно преобразование, объявляется метод convert_<имя>(context),
+    возвращающий функцию преобразования значения.
+    Результат совпадает с соответствующим ModelSerializer.
+    """
+
+    model = None
+    fields = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.names = tuple(name for name, _ in self.fields)
+        self.sources = tuple(source for _, source in self.fields)
+        self.converters = tuple(
+            (index, getattr(self, f'convert_{name}')(self.context))
+            for index, name in enumerate(self.names)
+            if hasattr(self, f'convert_{name}')
+        )
+
+    def to_representation(self, row):
+        if self.converters:
+            row = list(row)
+            for index, convert in self.converters:
+                row[index] = convert(row[index])
+        return dict(zip(self.names, row))
+
+    def serialize(self, queryset=None):
+        if queryset is None:
+            queryset = self.model.objects.all()
+        with serializer_timer():
+            return [
+                self.to_representation(row)
+                for row in queryset.values_list(*self.sources)
+            ]
+
+
+class TagValuesSerializer(ValuesSerializer):
+    model = Tag
+    fields = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('color', 'color'),
+        ('slug', 'slug'),
+    )
+
+
+class IngredientValuesSerializer(ValuesSerializer):
+    model = Ingredient
+    fields = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('measurement_unit', 'measurement_unit'),
+    )
+
+
+class BriefRecipeValuesSerializer(ValuesSerializer):
+    model = Recipe
+    fields = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('image', 'image'),
+        ('cooking_time', 'cooking_time'),
+    )
+
+    @staticmethod
+    def convert_image(context):
+        """Абсолютная ссылка на изображение, как у ImageField."""
+        request = context.get('request')
+        if request is None:
+            return lambda name: default_storage.url(name) if name else None
+        host = request.build_absolute_uri('/')[:-1]
+
+        def convert(name):
+            if not name:
+                return None
+            url = default_storage.url(name)
+            if url.startswith('/') and not url.startswith('//'):
+                return host + url
+            return request.build_absolute_uri(url)
+        return convert
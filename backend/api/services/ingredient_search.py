@@ -0,0 +1,200 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import (BooleanField, Case, Count, F, FloatField, Func,
+                              IntegerField, OuterRef, Subquery, Value, When)
+from django.db.models.functions import Coalesce
+
+from foodgram.constants import (INGREDIENT_SEARCH_THRESHOLD,
+                                MAX_INGREDIENT_SEARCH_RESULTS)
+from recipes.models import Ingredient, IngredientRecipe
+from .conditional import get_versions
+
+WORD_SEPARATOR = re.compile(r'[\W_]+')
+
+
+def get_words(text):
+    """Слова в нижнем регистре, разделители - как у pg_trgm."""
+    return WORD_SEPARATOR.sub(' ', text.lower().replace('ё', 'е')).split()
+
+
+def get_trigrams(text):
+    """Триграммы слов, дополненных пробелами, как в pg_trgm."""
+    trigrams = set()
+    for word in get_words(text):
+        padded = f'  {word} '
+        trigrams.update(
+            padded[index:index + 3] for index in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+def escape_like(value):
+    return (
+        value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
+
+
+class Operator(Func):
+    """Бинарный оператор SQL как логическое выражение для filter()."""
+
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def __init__(self, lhs, operator, rhs):
+        self.arg_joiner = f' {operator} '
+        super().__init__(lhs, rhs)
+
+
+class NgramIndex:
+    """
+    Триграммный индекс справочника ингредиентов в памяти процесса
+    для баз без pg_trgm.
+
+    Перестраивается при изменении справочника (версия ingredients
+    в общем кеше, см. conditional.bump_version) и раз
+    в INGREDIENT_SEARCH_INDEX_TTL секунд - для обновления частоты
+    использования.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.built_at = 0
+        self.postings = {}
+        self.names = {}
+        self.sizes = {}
+        self.usage = {}
+
+    def ensure_fresh(self):
+        version, = get_versions('ingredients')
+        expired = (
+            time.monotonic() - self.built_at
+            > settings.INGREDIENT_SEARCH_INDEX_TTL
+        )
+        if version == self.version and not expired:
+            return
+        with self.lock:
+            if version != self.version or expired:
+                self.build(version)
+
+    def build(self, version):
+        postings = {}
+        names = {}
+        sizes = {}
+        for pk, name in Ingredient.objects.values_list('id', 'name'):
+            names[pk] = ' '.join(get_words(name))
+            trigrams = get_trigrams(name)
+            sizes[pk] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(pk)
+        self.usage = dict(
+            IngredientRecipe.objects.order_by()
+            .values_list('ingredient').annotate(total=Count('pk'))
+        )
+        self.postings, self.names, self.sizes = postings, names, sizes
+        self.version, self.built_at = version, time.monotonic()
+
+    def search(self, query):
+        """
+        id ингредиентов: сначала совпадения с началом названия,
+        затем по убыванию сходства и частоты использования.
+
+        Сходство - как word_similarity и similarity в pg_trgm: доля
+        триграмм запроса, найденных в названии, и доля общих триграмм.
+        """
+        self.ensure_fresh()
+        trigrams = get_trigrams(query)
+        if not trigrams:
+            return []
+        prefix = ' '.join(get_words(query))
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        minimum = INGREDIENT_SEARCH_THRESHOLD * len(trigrams)
+        ranked = sorted(
+            (
+                (
+                    not self.names[pk].startswith(prefix),
+                    -count,
+                    self.sizes[pk],
+                    -self.usage.get(pk, 0),
+                    self.names[pk],
+                    pk,
+                )
+                for pk, count in shared.items()
+                if count >= minimum or self.names[pk].startswith(prefix)
+            )
+        )
+        return [row[-1] for row in ranked[:MAX_INGREDIENT_SEARCH_RESULTS]]
+
+
+ngram_index = NgramIndex()
+
+
+def get_trigram_queryset(queryset, query):
+    """
+    id подходящих ингредиентов по порядку выдачи на PostgreSQL.
+
+    Условия отбора - операторы, которые обслуживает GIN-индекс
+    по названию (gin_trgm_ops): <% (word_similarity не ниже
+    pg_trgm.word_similarity_threshold) и ILIKE по началу названия.
+    Функции сходства считаются только для сортировки найденного.
+    """
+    usage = (
+        IngredientRecipe.objects.filter(ingredient=OuterRef('pk'))
+        .order_by().values('ingredient').annotate(total=Count('pk'))
+        .values('total')
+    )
+    is_prefix = Operator(
+        F('name'), 'ILIKE', Value(f'{escape_like(query)}%')
+    )
+    return queryset.filter(
+        Operator(Value(query), '<%%', F('name')) | is_prefix
+    ).annotate(
+        is_prefix=is_prefix,
+        word_similarity=Func(
+            Value(query), F('name'),
+            function='word_similarity', output_field=FloatField(),
+        ),
+        similarity=Func(
+            Value(query), F('name'),
+            function='similarity', output_field=FloatField(),
+        ),
+        usage=Coalesce(Subquery(usage), 0),
+    ).order_by(
+        '-is_prefix', '-word_similarity', '-similarity', '-usage', 'name'
+    ).values_list('pk', flat=True)[:MAX_INGREDIENT_SEARCH_RESULTS]
+
+
+def search_ingredients(queryset, query):
+    """
+    Поиск ингредиентов с опечатками и по словам из середины названия.
+
+    На PostgreSQL порог сходства INGREDIENT_SEARCH_THRESHOLD задаётся
+    через SET LOCAL в транзакции поиска, чтобы отбор шёл индексируемым
+    оператором <%, а не сравнением результата функции (см.
+    get_trigram_queryset). В остальных базах - NgramIndex.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET LOCAL pg_trgm.word_similarity_threshold = '
+                    f'{float(INGREDIENT_SEARCH_THRESHOLD)}'
+                )
+            ids = list(get_trigram_queryset(queryset, query))
+    else:
+        ids = ngram_index.search(query)
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=pk, then=Value(position))
+          for position, pk in enumerate(ids)),
+        output_field=IntegerField(),
+    ))
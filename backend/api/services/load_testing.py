@@ -0,0 +1,255 @@
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+VARIABLE = re.compile(r'{{\s*(\w+)\s*}}')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def substitute(text, variables):
+    """Подстановка переменных Postman {{name}}."""
+    return VARIABLE.sub(
+        lambda match: str(variables.get(match[1], match[0])), text
+    )
+
+
+@dataclass
+class PostmanRequest:
+    """Запрос из коллекции Postman."""
+
+    folder: str
+    name: str
+    method: str
+    url: str
+    headers: dict
+    body: str = ''
+
+    @property
+    def endpoint(self):
+        """Ключ для статистики: метод и адрес без {{baseUrl}}."""
+        return f'{self.method} {self.url.replace("{{baseUrl}}", "")}'
+
+
+def get_auth_headers(auth):
+    if not auth or auth.get('type') != 'apikey':
+        return {}
+    options = {entry['key']: entry['value'] for entry in auth['apikey']}
+    if options.get('in', 'header') != 'header':
+        return {}
+    return {options.get('key', 'Authorization'): options['value']}
+
+
+def load_collection(path):
+    """
+    Запросы коллекции по папкам ('recipes/get_recipes') и её переменные.
+    Авторизация наследуется от папок, как в Postman.
+    """
+    with open(path, encoding='utf-8') as file:
+        collection = json.load(file)
+    requests = []
+
+    def walk(items, folder, auth):
+        for item in items:
+            if 'item' in item:
+                walk(
+                    item['item'],
+                    f'{folder}/{item["name"]}'.strip('/'),
+                    item.get('auth') or auth,
+                )
+                continue
+            request = item['request']
+            url = request['url']
+            headers = {
+                header['key']: header['value']
+                for header in request.get('header', [])
+                if not header.get('disabled')
+            }
+            headers.update(get_auth_headers(request.get('auth') or auth))
+            requests.append(PostmanRequest(
+                folder=folder,
+                name=item['name'],
+                method=request['method'],
+                url=url['raw'] if isinstance(url, dict) else url,
+                headers=headers,
+                body=request.get('body', {}).get('raw', ''),
+            ))
+
+    walk(collection['item'], '', collection.get('auth'))
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', [])
+    }
+    return requests, variables
+
+
+@dataclass
+class Result:
+    endpoint: str
+    status: int
+    duration: float
+
+
+@dataclass
+class Report:
+    """Результаты нагрузки по эндпоинтам."""
+
+    elapsed: float = 0
+    results: dict = field(default_factory=lambda: defaultdict(list))
+
+    def add(self, result):
+        self.results[result.endpoint].append(result)
+
+    def rows(self):
+        everything = [
+            result for results in self.results.values() for result in results
+        ]
+        groups = sorted(self.results.items())
+        groups.append(('ИТОГО', everything))
+        for endpoint, results in groups:
+            if not results:
+                continue
+            durations = [result.duration * 1000 for result in results]
+            errors = sum(
+                1 for result in results
+                if not result.status or result.status >= 400
+            )
+            yield {
+                'endpoint': endpoint,
+                'requests': len(results),
+                'rps': len(results) / self.elapsed if self.elapsed else 0,
+                'error_rate': errors / len(results),
+                'p50_ms': percentile(durations, 0.5),
+                'p95_ms': percentile(durations, 0.95),
+                'p99_ms': percentile(durations, 0.99),
+            }
+
+
+class HttpClient:
+    """Минимальный HTTP-клиент на urllib без внешних зависимостей."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def send(self, method, url, headers=None, body=None):
+        """(статус, тело ответа); статус 0 - ошибка соединения."""
+        if url.startswith('/'):
+            url = self.base_url + url
+        url = urllib.parse.quote(url, safe=':/?&=%#+,')
+        data = None
+        headers = dict(headers or {})
+        if body:
+            data = body.encode()
+            headers.setdefault('Content-Type', 'application/json')
+        request = urllib.request.Request(
+            url, data=data, headers=headers, method=method
+        )
+        try:
+            with urllib.request.urlopen(
+                request, timeout=self.timeout
+            ) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+        except (urllib.error.URLError, OSError):
+            return 0, b''
+
+    def json(self, method, url, headers=None, payload=None):
+        status, content = self.send(
+            method, url, headers,
+            json.dumps(payload) if payload is not None else None,
+        )
+        try:
+            return status, json.loads(content or b'null')
+        except ValueError:
+            return status, None
+
+
+def get_account(client, number, password):
+    """
+    (id, токен) учётной записи loadtest<number>@example.com;
+    при первом обращении она регистрируется.
+    """
+    email = f'loadtest{number}@example.com'
+    credentials = {'email': email, 'password': password}
+    status, data = client.json(
+        'POST', '/api/auth/token/login/', payload=credentials
+    )
+    if status != 200:
+        client.json('POST', '/api/users/', payload={
+            **credentials,
+            'username': f'loadtest{number}',
+            'first_name': 'Нагрузка',
+            'last_name': f'Тест {number}',
+        })
+        status, data = client.json(
+            'POST', '/api/auth/token/login/', payload=credentials
+        )
+    if status != 200:
+        raise ValueError(
+            f'Не удалось получить токен для {email} (статус {status}).'
+        )
+    token = data['auth_token']
+    _, user = client.json(
+        'GET', '/api/users/me/', headers={'Authorization': f'Token {token}'}
+    )
+    return user['id'], token
+
+
+def run_load(client, scenarios, weights, make_variables, users, duration):
+    """
+    Нагрузка из users виртуальных пользователей в течение duration
+    секунд. Каждый пользователь в цикле выбирает сценарий по весу
+    и выполняет его запросы по порядку со своими переменными.
+    """
+    report = Report()
+    lock = threading.Lock()
+    names = list(scenarios)
+    deadline = time.monotonic() + duration
+
+    def virtual_user(number):
+        rng = random.Random(number)
+        variables = make_variables(number)
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights=[
+                weights[name] for name in names
+            ])[0]
+            for request in scenarios[scenario]:
+                variables['baseUrl'] = client.base_url
+                started = time.perf_counter()
+                status, _ = client.send(
+                    request.method,
+                    substitute(request.url, variables),
+                    {
+                        key: substitute(value, variables)
+                        for key, value in request.headers.items()
+                    },
+                    substitute(request.body, variables),
+                )
+                result = Result(
+                    request.endpoint, status, time.perf_counter() - started
+                )
+                with lock:
+                    report.add(result)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        for future in [
+            executor.submit(virtual_user, number) for number in range(users)
+        ]:
+            future.result()
+    report.elapsed = time.monotonic() - started
+    return report
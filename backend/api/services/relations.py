@@ -0,0 +1,32 @@
+from django.db import IntegrityError, router, transaction
+
+
+def add_relation(model, **values):
+    """
+    Добавление строки одним INSERT без предварительной проверки:
+    повтор, в том числе при гонке двойного нажатия, отклоняется
+    ограничением уникальности. Вставка выполняется в точке сохранения,
+    поэтому ошибка не прерывает внешнюю транзакцию. Событие журнала
+    изменений записывает триггер базы тем же запросом.
+
+    Возвращает True, если строка добавлена, и False, если такая уже есть.
+    """
+    using = router.db_for_write(model)
+    try:
+        with transaction.atomic(using=using):
+            model(**values).save(force_insert=True, using=using)
+    except IntegrityError:
+        return False
+    return True
+
+
+def remove_relation(model, **values):
+    """
+    Удаление строки одним DELETE в основной базе (выборку
+    маршрутизатор мог бы направить на реплику), событие журнала
+    записывает триггер; True, если строка была.
+    """
+    deleted, _ = model.objects.using(
+        router.db_for_write(model)
+    ).filter(**values).delete()
+    return bool(deleted)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram.checks import check_shared_cache
+from users.models import User
+
+ME_URL = '/api/users/me/'
+
+
+class CachedTokenAuthenticationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123',
+            first_name='Имя', last_name='Фамилия',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Первый запрос кладёт связку токен - пользователь в кеш.
+        self.assertEqual(self.client.get(ME_URL).status_code, 200)
+
+    def test_cached_token_is_used(self):
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+    def test_deleted_token_is_rejected(self):
+        self.token.delete()
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_logout_revokes_token(self):
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.client.get(ME_URL).status_code, 401)
+
+    def test_last_login_update_keeps_cache(self):
+        self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get(ME_URL)
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+
+    @override_settings(DEBUG=False)
+    def test_process_local_cache_is_an_error(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['foodgram.E001'])
+
+    @override_settings(DEBUG=True)
+    def test_process_local_cache_is_allowed_in_debug(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/foodgram-test-cache',
+    }})
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
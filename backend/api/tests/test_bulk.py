@@ -0,0 +1,132 @@
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from outbox.models import ChangeEvent
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
+                            get_tags_mask)
+from users.models import User
+
+URL = '/api/recipes/bulk/'
+MISSING_ID = 10 ** 6
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+class RecipeBulkTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.tags = [
+            Tag.objects.create(name=name, slug=name, color='#FFFFFF')
+            for name in ('breakfast', 'lunch', 'dinner')
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар')
+        ]
+
+    def make_item(self, name='Суп', tags=None, ingredient=None):
+        return {
+            'name': name,
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.pk for tag in tags or self.tags[:1]],
+            'ingredients': [{
+                'id': ingredient or self.ingredients[0].pk, 'amount': 5,
+            }],
+        }
+
+    def post(self, *items):
+        return self.client.post(URL, list(items), format='json')
+
+    def test_mixed_batch(self):
+        response = self.post(
+            self.make_item('Суп'),
+            self.make_item('Каша', ingredient=MISSING_ID),
+            self.make_item('Салат'),
+        )
+        self.assertEqual(response.status_code, 201)
+        first, error, last = response.data
+        self.assertIn('ingredients', error['errors'])
+        self.assertEqual(
+            dict(Recipe.objects.values_list('pk', 'name')),
+            {first['id']: 'Суп', last['id']: 'Салат'},
+        )
+        self.assertEqual(
+            IngredientRecipe.objects.filter(
+                recipe__in=[first['id'], last['id']]
+            ).count(),
+            2,
+        )
+
+    def test_all_invalid(self):
+        response = self.post(
+            self.make_item(ingredient=MISSING_ID), {'name': 'Суп'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_tags_mask(self):
+        response = self.post(
+            self.make_item(tags=self.tags[:2]),
+            self.make_item(tags=self.tags[2:]),
+        )
+        self.assertEqual(response.status_code, 201)
+        for result, tags in zip(
+            response.data, (self.tags[:2], self.tags[2:])
+        ):
+            recipe = Recipe.objects.get(pk=result['id'])
+            self.assertEqual(
+                recipe.tags_mask, get_tags_mask(tag.pk for tag in tags)
+            )
+            self.assertEqual(set(recipe.tags.all()), set(tags))
+        lunch = self.client.get('/api/recipes/', {'tags': 'lunch'})
+        self.assertEqual(
+            [recipe['id'] for recipe in lunch.data['results']],
+            [response.data[0]['id']],
+        )
+
+    def test_inserts_are_transactional(self):
+        with mock.patch(
+            'api.serializers.record_many', side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.post(self.make_item(), self.make_item())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+        self.assertFalse(IngredientRecipe.objects.exists())
+        self.assertFalse(ChangeEvent.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        # Первый запрос кладёт токен в кеш.
+        self.post(self.make_item())
+        counts = []
+        for size in (1, 10):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(*(self.make_item() for _ in range(size)))
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[1], 15)
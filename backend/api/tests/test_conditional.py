@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from users.models import User
+
+
+class RecipeETagTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123',
+            first_name='Имя', last_name='Фамилия',
+        )
+        self.tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#E26C2D'
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Суп', text='Описание', cooking_time=10,
+            image='recipes/images/soup.png',
+        )
+        self.recipe.tags.add(self.tag)
+        IngredientRecipe.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=5
+        )
+        self.client = APIClient()
+        self.urls = (f'/api/recipes/{self.recipe.pk}/', '/api/recipes/')
+
+    def assertRevalidates(self, status_code):
+        for url, etag in zip(self.urls, self.etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status_code, url)
+
+    def remember_etags(self):
+        self.etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.etags.append(response['ETag'])
+        self.assertRevalidates(304)
+
+    def test_recipe_change(self):
+        self.remember_etags()
+        self.recipe.name = 'Борщ'
+        self.recipe.save()
+        self.assertRevalidates(200)
+
+    def test_tag_change(self):
+        self.remember_etags()
+        self.tag.name = 'Ранний завтрак'
+        self.tag.save()
+        self.assertRevalidates(200)
+
+    def test_ingredient_change(self):
+        self.remember_etags()
+        self.ingredient.measurement_unit = 'кг'
+        self.ingredient.save()
+        self.assertRevalidates(200)
+
+    def test_author_change(self):
+        self.remember_etags()
+        self.author.first_name = 'Другое'
+        self.author.save()
+        self.assertRevalidates(200)
+
+    def test_login_keeps_etag(self):
+        self.remember_etags()
+        self.author.save(update_fields=['last_login'])
+        self.assertRevalidates(304)
+
+    def test_evicted_version_changes_etag(self):
+        self.remember_etags()
+        cache.clear()
+        self.assertRevalidates(200)
+
+    def test_user_state(self):
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.remember_etags()
+        self.client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertRevalidates(200)
@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.services.conditional import bump_version, get_version_key
+from api.services.facets import reset_facets
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+class FacetsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        self.lunch = Tag.objects.create(
+            name='Обед', slug='lunch', color='#FFFFFF'
+        )
+        self.dinner = Tag.objects.create(
+            name='Ужин', slug='dinner', color='#000000'
+        )
+        self.recipe = self.create_recipe(self.lunch)
+        self.client = APIClient()
+
+    def create_recipe(self, *tags):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Суп', text='Описание',
+            cooking_time=10, image='recipes/images/soup.png',
+        )
+        recipe.tags.add(*tags)
+        return recipe
+
+    def get_counts(self):
+        response = self.client.get('/api/recipes/facets/')
+        self.assertEqual(response.status_code, 200)
+        return {tag['slug']: tag['recipes_count'] for tag in response.json()}
+
+    def test_counts_follow_changes(self):
+        self.assertEqual(self.get_counts(), {'lunch': 1, 'dinner': 0})
+        self.create_recipe(self.lunch, self.dinner)
+        self.assertEqual(self.get_counts(), {'lunch': 2, 'dinner': 1})
+        self.recipe.tags.clear()
+        self.assertEqual(self.get_counts(), {'lunch': 1, 'dinner': 1})
+
+    def test_version_in_shared_cache(self):
+        reset_facets()
+        version = cache.get(get_version_key('facets'))
+        self.assertIsNotNone(version)
+        reset_facets()
+        self.assertNotEqual(cache.get(get_version_key('facets')), version)
+
+    def test_bulk_insert_needs_reset(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='Рагу', text='Описание',
+            cooking_time=10, image='recipes/images/stew.png',
+        )
+        self.assertEqual(self.get_counts(), {'lunch': 1, 'dinner': 0})
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag=self.dinner)
+        ])
+        self.assertEqual(self.get_counts(), {'lunch': 1, 'dinner': 0})
+        reset_facets()
+        self.assertEqual(self.get_counts(), {'lunch': 1, 'dinner': 1})
+
+    def test_primary_after_reset(self):
+        with mock.patch('api.services.facets.replica_reads') as reads:
+            reset_facets()
+            self.get_counts()
+        reads.assert_called_once_with(False)
+        with mock.patch('api.services.facets.time') as clock:
+            clock.time_ns.return_value = time.time_ns() + 10**12
+            with mock.patch('api.services.facets.replica_reads') as reads:
+                bump_version('users')
+                self.client.get('/api/recipes/facets/?author=0')
+        reads.assert_not_called()
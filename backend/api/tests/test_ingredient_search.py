@@ -0,0 +1,67 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+
+from api.services.ingredient_search import (NgramIndex, Operator,
+                                            get_trigram_queryset,
+                                            search_ingredients)
+from recipes.models import Ingredient
+
+
+class IngredientSearchTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for name in ('соль', 'сахар', 'морская соль', 'сливки'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def search(self, query):
+        return list(search_ingredients(
+            Ingredient.objects.all(), query
+        ).values_list('name', flat=True))
+
+    def test_prefix_first(self):
+        self.assertEqual(self.search('сол'), ['соль', 'морская соль'])
+
+    def test_typo(self):
+        self.assertIn('сахар', self.search('сахарр'))
+
+    def test_index_rebuilt_after_change(self):
+        self.assertEqual(self.search('перец'), [])
+        Ingredient.objects.create(name='перец', measurement_unit='г')
+        self.assertEqual(self.search('перец'), ['перец'])
+
+    def test_other_process_index_rebuilt(self):
+        index = NgramIndex()
+        index.ensure_fresh()
+        Ingredient.objects.filter(name='сливки').update(name='сметана')
+        Ingredient.objects.get(name='соль').save()
+        index.ensure_fresh()
+        self.assertIn('сметана', index.names.values())
+
+    def test_postgresql_filter_uses_indexable_operators(self):
+        queryset = get_trigram_queryset(Ingredient.objects.all(), 'соль')
+        (condition,) = queryset.query.where.children
+        self.assertEqual(condition.connector, 'OR')
+        self.assertEqual(
+            [
+                (type(lookup.lhs), lookup.lhs.arg_joiner.strip())
+                for lookup in condition.children
+            ],
+            [(Operator, '<%%'), (Operator, 'ILIKE')],
+        )
+        # Порог не сравнивается с результатом функции word_similarity.
+        self.assertNotIn('word_similarity(', str(queryset.query).split(
+            'WHERE'
+        )[1].split('ORDER BY')[0])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Нужен PostgreSQL.')
+    def test_postgresql_plan_uses_trigram_index(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = get_trigram_queryset(
+                Ingredient.objects.all(), 'соль'
+            ).explain()
+        self.assertIn('recipes_ingredient_name_trgm', plan)
@@ -0,0 +1,160 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.services.relations import add_relation, remove_relation
+from foodgram.db_router import PrimaryReplicaRouter
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+
+def create_recipe(author):
+    return Recipe.objects.create(
+        author=author, name='Суп', text='Описание', cooking_time=10,
+        image='recipes/images/soup.png',
+    )
+
+
+class TogglesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass-123'
+        )
+        self.author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        self.recipe = create_recipe(self.author)
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def assert_toggle(self, url, model, **values):
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(model.objects.filter(**values).count(), 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertFalse(model.objects.filter(**values).exists())
+
+    def test_favorite(self):
+        self.assert_toggle(
+            f'/api/recipes/{self.recipe.pk}/favorite/',
+            Favorite, user=self.user, recipe=self.recipe,
+        )
+
+    def test_shopping_cart(self):
+        self.assert_toggle(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/',
+            ShoppingCart, user=self.user, recipe=self.recipe,
+        )
+
+    def test_subscribe(self):
+        self.assert_toggle(
+            f'/api/users/{self.author.pk}/subscribe/',
+            Subscription, user=self.user, author=self.author,
+        )
+
+    def test_missing_objects(self):
+        self.assertEqual(
+            self.client.post('/api/recipes/0/favorite/').status_code, 400
+        )
+        self.assertEqual(
+            self.client.delete('/api/recipes/0/favorite/').status_code, 404
+        )
+        self.assertEqual(
+            self.client.delete('/api/users/0/subscribe/').status_code, 404
+        )
+
+    def test_duplicate_keeps_outer_transaction(self):
+        with transaction.atomic():
+            self.assertTrue(
+                add_relation(Favorite, user=self.user, recipe=self.recipe)
+            )
+            self.assertFalse(
+                add_relation(Favorite, user=self.user, recipe=self.recipe)
+            )
+            self.assertEqual(Favorite.objects.count(), 1)
+
+    def test_remove_uses_primary(self):
+        add_relation(Favorite, user=self.user, recipe=self.recipe)
+        with mock.patch.object(
+            PrimaryReplicaRouter, 'db_for_read', return_value='replica_1'
+        ):
+            self.assertTrue(
+                remove_relation(Favorite, user=self.user, recipe=self.recipe)
+            )
+        self.assertFalse(Favorite.objects.exists())
+
+
+class ConcurrentTogglesTest(TransactionTestCase):
+    # Без обёртки теста в транзакцию: запросы идут из разных потоков
+    # со своими соединениями и должны видеть зафиксированные данные.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass-123'
+        )
+        self.author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        self.recipe = create_recipe(self.author)
+        self.token = Token.objects.create(user=self.user)
+
+    def request_concurrently(self, method, url, count=8):
+        """Статусы одновременных запросов клиентов одного пользователя."""
+        barrier = threading.Barrier(count)
+        statuses = []
+
+        def worker():
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+            barrier.wait()
+            try:
+                statuses.append(getattr(client, method)(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def assert_double_submit(self, url, model, **values):
+        self.assertEqual(
+            self.request_concurrently('post', url), [201] + [400] * 7
+        )
+        self.assertEqual(model.objects.filter(**values).count(), 1)
+        self.assertEqual(
+            self.request_concurrently('delete', url), [204] + [400] * 7
+        )
+        self.assertFalse(model.objects.filter(**values).exists())
+
+    def test_favorite(self):
+        self.assert_double_submit(
+            f'/api/recipes/{self.recipe.pk}/favorite/',
+            Favorite, user=self.user, recipe=self.recipe,
+        )
+
+    def test_shopping_cart(self):
+        self.assert_double_submit(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/',
+            ShoppingCart, user=self.user, recipe=self.recipe,
+        )
+
+    def test_subscribe(self):
+        self.assert_double_submit(
+            f'/api/users/{self.author.pk}/subscribe/',
+            Subscription, user=self.user, author=self.author,
+        )
@@ -0,0 +1,51 @@
+import io
+import math
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.management.commands.benchmark_renderers import PAGE_SIZES, make_page
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+
+@skipIf(renderers.orjson is None, 'orjson не установлен')
+class FastJSONRendererTest(SimpleTestCase):
+    standard = JSONRenderer()
+    fast = FastJSONRenderer()
+
+    def test_recipe_pages_are_identical(self):
+        for size in PAGE_SIZES:
+            page = make_page(size)
+            expected = self.standard.render(page)
+            self.assertEqual(self.fast.render(page), expected, size)
+            self.assertEqual(
+                FastJSONParser().parse(io.BytesIO(expected)),
+                JSONParser().parse(io.BytesIO(expected)),
+            )
+
+    def test_plain_floats_are_identical(self):
+        data = {'values': [0.5, 1.25, -3.0, 100.125, 0.1]}
+        self.assertEqual(
+            self.fast.render(data), self.standard.render(data)
+        )
+
+    def test_exponent_floats_differ(self):
+        data = [1e-07, 2.5e-10]
+        self.assertEqual(self.standard.render(data), b'[1e-07,2.5e-10]')
+        self.assertEqual(self.fast.render(data), b'[1e-7,2.5e-10]')
+
+    def test_non_finite_floats_render_as_null(self):
+        data = [math.nan, math.inf]
+        with self.assertRaises(ValueError):
+            self.standard.render(data)
+        self.assertEqual(self.fast.render(data), b'[null,null]')
+
+    def test_line_separators_are_escaped(self):
+        data = {'text': 'a\u2028b\u2029c'}
+        self.assertEqual(
+            self.fast.render(data), self.standard.render(data)
+        )
@@ -0,0 +1,193 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.serializers import (BriefRecipeSerializer, CustomUserSerializer,
+                             IngredientSerializer, RecipeSerializer,
+                             TagSerializer)
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+
+class ValuesSerializersTest(TestCase):
+    """
+    Ответы на values() и выборочные поля совпадают с полными
+    ModelSerializer на обычных экземплярах моделей.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            password='pass-123', first_name='Читатель', last_name='Книжный',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'cook{number}', email=f'cook{number}@example.com',
+                password='pass-123', first_name=f'Имя{number}',
+                last_name=f'Фамилия{number}',
+            )
+            for number in range(3)
+        ]
+        cls.tags = [
+            Tag.objects.create(name=name, slug=slug, color=color)
+            for name, slug, color in (
+                ('Завтрак', 'breakfast', '#E26C2D'),
+                ('Обед', 'lunch', '#49B64E'),
+                ('Ужин', 'dinner', None),
+            )
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (
+                ('соль', 'г'), ('сахар', 'ст. л.'), ('молоко', 'мл'),
+                ('соевый соус', 'мл'),
+            )
+        ]
+        for number in range(7):
+            recipe = Recipe.objects.create(
+                author=cls.authors[number % 3],
+                name=f'Рецепт «{number}»',
+                text='Описание\nрецепта',
+                cooking_time=number + 1,
+                image=f'recipes/images/{number}.png',
+            )
+            recipe.tags.set(cls.tags[:number % 3 + 1])
+            for index, ingredient in enumerate(
+                cls.ingredients[:number % 4 + 1], start=1
+            ):
+                IngredientRecipe.objects.create(
+                    recipe=recipe, ingredient=ingredient,
+                    amount=number * index + 1,
+                )
+            if number % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if number % 3 == 0:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        for author in cls.authors[:2]:
+            Subscription.objects.create(user=cls.user, author=author)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = self.user
+        self.context = {'request': self.request}
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    @staticmethod
+    def render(data):
+        return JSONRenderer().render(data)
+
+    def get_recipe(self, recipe):
+        """Эталонное представление рецепта без оптимизаций выборки."""
+        return json.loads(self.render(
+            RecipeSerializer(Recipe.objects.get(pk=recipe.pk),
+                             context=self.context).data
+        ))
+
+    def test_tags(self):
+        self.assertEqual(
+            self.get('/api/tags/').content,
+            self.render(TagSerializer(Tag.objects.all(), many=True).data),
+        )
+
+    def test_ingredients(self):
+        for url, queryset in (
+            ('/api/ingredients/', Ingredient.objects.all()),
+            (
+                '/api/ingredients/?name=сах',
+                Ingredient.objects.filter(name='сахар'),
+            ),
+        ):
+            self.assertEqual(
+                self.get(url).content,
+                self.render(IngredientSerializer(queryset, many=True).data),
+            )
+
+    def test_subscriptions(self):
+        for limit in (None, 1):
+            url = '/api/users/subscriptions/'
+            if limit:
+                url += f'?recipes_limit={limit}'
+            results = self.get(url).json()['results']
+            expected = []
+            for author in self.authors[:2]:
+                data = CustomUserSerializer(author, context=self.context).data
+                recipes = author.recipes.all()
+                data['recipes'] = BriefRecipeSerializer(
+                    recipes[:limit] if limit else recipes,
+                    many=True, context=self.context,
+                ).data
+                data['recipes_count'] = recipes.count()
+                expected.append(json.loads(self.render(data)))
+            self.assertEqual(results, expected)
+
+    def test_recipe_list_and_detail(self):
+        recipes = Recipe.objects.all()
+        results = self.get('/api/recipes/?limit=10').json()['results']
+        self.assertEqual(
+            results, [self.get_recipe(recipe) for recipe in recipes]
+        )
+        for recipe in recipes:
+            self.assertEqual(
+                self.get(f'/api/recipes/{recipe.pk}/').json(),
+                self.get_recipe(recipe),
+            )
+
+    def test_multi_get(self):
+        recipes = list(Recipe.objects.order_by('pk')[:3])
+        ids = ','.join(str(recipe.pk) for recipe in reversed(recipes))
+        self.assertEqual(
+            self.get(f'/api/recipes/?ids={ids}').json(),
+            [self.get_recipe(recipe) for recipe in reversed(recipes)],
+        )
+
+    def test_sparse_fields(self):
+        recipe = Recipe.objects.order_by('pk').last()
+        full = self.get_recipe(recipe)
+        for fields in (
+            ('id', 'name'),
+            ('id', 'tags', 'is_favorited', 'is_in_shopping_cart'),
+            ('author', 'ingredients', 'image', 'text', 'cooking_time'),
+        ):
+            self.assertEqual(
+                self.get(
+                    f'/api/recipes/{recipe.pk}/?fields={",".join(fields)}'
+                ).json(),
+                {name: full[name] for name in fields},
+            )
+
+    def test_expand(self):
+        recipe = Recipe.objects.order_by('pk').last()
+        full = self.get_recipe(recipe)
+        collapsed = {
+            **full,
+            'author': recipe.author_id,
+            'tags': [tag['id'] for tag in full['tags']],
+            'ingredients': [
+                {'id': item['id'], 'amount': item['amount']}
+                for item in full['ingredients']
+            ],
+        }
+        for expand in ((), ('author',), ('tags', 'ingredients')):
+            expected = {
+                name: full[name] if name in expand else value
+                for name, value in collapsed.items()
+            }
+            url = f'/api/recipes/{recipe.pk}/?expand={",".join(expand)}'
+            self.assertEqual(self.get(url).json(), expected, url)
+            url = f'/api/recipes/?ids={recipe.pk}&expand={",".join(expand)}'
+            self.assertEqual(self.get(url).json(), [expected], url)
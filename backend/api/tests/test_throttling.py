@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+
+
+def throttle_settings(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates
+        },
+        'NUM_PROXIES': 1,
+    })
+
+
+@throttle_settings(read='3/min', bulk='5/min')
+class TokenBucketThrottleTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, ip=None, **extra):
+        if ip is not None:
+            extra['HTTP_X_FORWARDED_FOR'] = ip
+        return self.client.get('/api/tags/', **extra).status_code
+
+    def test_burst_then_reject(self):
+        self.assertEqual([self.get() for _ in range(4)], [200, 200, 200, 429])
+        response = self.client.get('/api/tags/')
+        self.assertIn('Retry-After', response)
+
+    def test_key_outlives_drained_bucket(self):
+        # incr не продлевает срок ключа: без обновления срока ключ
+        # осушенной корзины истекал бы посреди окна, открывая всплеск.
+        with mock.patch('time.time') as clock:
+
+            def get_at(seconds, count):
+                clock.return_value = 1_000_000 + seconds
+                return [self.get() for _ in range(count)]
+
+            self.assertEqual(get_at(0, 3), [200, 200, 200])
+            self.assertEqual(get_at(50, 1), [200])
+            self.assertEqual(get_at(70, 2), [200, 200])
+            self.assertEqual(get_at(100, 2), [200, 200])
+            # Первый ключ прожил бы до 120 с, а корзина пуста до 160 с.
+            self.assertEqual(get_at(121, 2), [200, 429])
+            self.assertEqual(get_at(181, 3), [200, 200, 200])
+
+    def test_clients_behind_proxy_have_own_buckets(self):
+        self.assertEqual(
+            [self.get('10.0.0.1') for _ in range(4)], [200, 200, 200, 429]
+        )
+        self.assertEqual(self.get('10.0.0.2'), 200)
+
+    def test_spoofed_forwarded_for_is_ignored(self):
+        # nginx дописывает настоящий адрес клиента в конец заголовка.
+        statuses = [
+            self.client.get(
+                '/api/tags/',
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}, 192.168.1.7',
+            ).status_code
+            for number in range(4)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_users_have_own_buckets(self):
+        for _ in range(3):
+            self.get()
+        self.assertEqual(self.get(), 429)
+        self.client.force_authenticate(User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        ))
+        self.assertEqual(self.get(), 200)
+
+    def test_bulk_costs_a_token_per_recipe(self):
+        self.client.force_authenticate(User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        ))
+
+        def post(size):
+            return self.client.post(
+                '/api/recipes/bulk/', ['рецепт'] * size, format='json'
+            ).status_code
+
+        self.assertEqual(post(3), 400)
+        # Отказ не расходует токены: оставшиеся два доступны.
+        self.assertEqual(post(3), 429)
+        self.assertEqual(post(2), 400)
+        self.assertEqual(post(1), 429)
@@ -0,0 +1,43 @@
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from users.models import User
+
+
+class DeleteUserTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_delete_self(self):
+        logouts = []
+
+        def receiver(**kwargs):
+            logouts.append(kwargs['user'].pk)
+
+        user_logged_out.connect(receiver)
+        self.addCleanup(user_logged_out.disconnect, receiver)
+        response = self.client.delete(
+            f'/api/users/{self.user.pk}/',
+            {'current_password': 'pass-123'}, format='json',
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(logouts, [self.user.pk])
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            list(Job.objects.values_list('task', 'payload')),
+            [('users.delete_user', {'user_id': self.user.pk})],
+        )
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
@@ -0,0 +1,126 @@
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from foodgram.metrics import registry
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'20/min' -> (20, 60); None отключает ограничение."""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket (GCRA).
+
+    Корзина на num запросов за period пополняется равномерно и
+    допускает всплеск до num запросов подряд. В кеше хранится только
+    теоретическое время следующего запроса (TAT) в миллисекундах,
+    которое сдвигается атомарным cache.incr. incr не продлевает жизнь
+    ключа, поэтому после него срок обновляется через cache.touch до
+    момента, когда корзина снова наполнится: отсутствие ключа и
+    полная корзина означают одно и то же. Дополнительные обращения
+    нужны только при создании ключа, после простоя и при отказе.
+
+    Область выбирается по действию представления (throttle_scopes),
+    иначе по методу: read или write. Запрос расходует
+    view.get_throttle_cost(request) токенов (по умолчанию один);
+    запрос дороже ёмкости корзины не проходит никогда.
+
+    Анонимные клиенты различаются по IP с учётом NUM_PROXIES
+    (адрес из X-Forwarded-For, который добавляет nginx). Состояние
+    должно храниться в общем кеше (см. foodgram.checks), иначе каждый
+    процесс ведёт свои корзины.
+    """
+
+    cache = cache
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    @staticmethod
+    def get_cost(request, view):
+        get_cost = getattr(view, 'get_throttle_cost', None)
+        return 1 if get_cost is None else max(1, get_cost(request))
+
+    @staticmethod
+    def get_scope(request, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        scope = scopes.get(getattr(view, 'action', None))
+        if scope is not None:
+            return scope
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_cache_key(self, request, scope):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'throttle:{scope}:{ident}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'Не задана частота запросов для области {scope!r}.'
+            )
+        num, period = parse_rate(rate)
+        if num is None:
+            return True
+        interval = period * 1000 // num
+        capacity = num * interval
+        increment = interval * self.get_cost(request, view)
+        key = self.get_cache_key(request, scope)
+        now = int(time.time() * 1000)
+        tat = self.advance(key, increment, now)
+        if tat - now <= capacity:
+            return True
+        # Отказ не расходует токены: TAT возвращается к прежнему значению.
+        self.cache.set(
+            key, tat - increment, self.get_timeout(tat - increment, now)
+        )
+        self.wait_seconds = (tat - capacity - now) / 1000
+        registry.inc(
+            'foodgram_throttle_rejections_total',
+            'Запросы, отклонённые ограничением частоты.',
+            scope=scope,
+        )
+        return False
+
+    @staticmethod
+    def get_timeout(tat, now):
+        """Срок жизни ключа в секундах: до наполнения корзины."""
+        return max(1, -(-(tat - now) // 1000))
+
+    def advance(self, key, increment, now):
+        """Сдвиг TAT на increment мс; возвращает новое значение."""
+        try:
+            tat = self.cache.incr(key, increment)
+        except ValueError:
+            tat = now + increment
+            if self.cache.add(key, tat, self.get_timeout(tat, now)):
+                return tat
+            tat = self.cache.incr(key, increment)
+        if tat - increment < now:
+            # Корзина успела наполниться: отсчёт от текущего момента.
+            tat = now + increment
+            self.cache.set(key, tat, self.get_timeout(tat, now))
+        else:
+            self.cache.touch(key, self.get_timeout(tat, now))
+        return tat
+
+    def wait(self):
+        return self.wait_seconds
@@ -2,7 +2,7 @@ from django.urls import include, path
 from rest_framework import routers
 
 from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                       TagViewSet)
+                       TagViewSet, metrics)
 
 
 router = routers.DefaultRouter()
@@ -13,5 +13,6 @@ router.register(r'recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
     path(r'auth/', include('djoser.urls.authtoken')),
+    path(r'metrics/', metrics, name='metrics'),
     path(r'', include(router.urls)),
 ]
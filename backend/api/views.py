@@ -1,29 +1,90 @@
 import datetime as dt
 
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.crypto import constant_time_compare
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from foodgram.constants import MAX_BULK_RECIPES, MAX_RECIPE_IDS
+from foodgram.metrics import registry
+from outbox.recorder import explicit_recording
 from users.models import Subscription, User
+from users.tasks import delete_user
 from .filters import IngredientSearchFilter, RecipeFilter
 from .permissions import IsAuthorOrAdminOrReadOnly
+from .services.conditional import (conditional_response,
+                                   get_recipe_detail_validators,
+                                   get_recipe_list_validators)
+from .services.facets import get_cached_tag_counts, reset_facets
+from .services.fast_serializers import (IngredientValuesSerializer,
+                                        TagValuesSerializer)
+from .services.relations import add_relation, remove_relation
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
 from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeCreateSerializer, RecipeSerializer,
-                          ShoppingCartSerializer, SubscriptionCreateSerializer,
-                          SubscriptionSerializer, TagSerializer)
+                          RecipeBulkItemSerializer, RecipeCreateSerializer,
+                          RecipeSerializer, ShoppingCartSerializer,
+                          SubscriptionCreateSerializer, SubscriptionSerializer,
+                          TagSerializer)
+
+
+def parse_pk(value):
+    """id из адреса; нечисловой id - как несуществующий объект."""
+    try:
+        return int(value)
+    except ValueError:
+        raise NotFound
+
+
+def get_unique_message(serializer_class):
+    """Сообщение о повторе из UniqueTogetherValidator сериализатора."""
+    return next(
+        validator.message for validator in serializer_class.Meta.validators
+        if isinstance(validator, UniqueTogetherValidator)
+    )
 
 
 class CustomUserViewSet(UserViewSet):
 
+    @staticmethod
+    def annotate_is_subscribed(queryset, user):
+        """Признак подписки текущего пользователя одним подзапросом."""
+        if user.is_anonymous:
+            return queryset
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(user=user, author=OuterRef('pk'))
+            )
+        )
+
+    def get_queryset(self):
+        return self.annotate_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
+
+    def perform_destroy(self, instance):
+        """
+        Пользователь сразу деактивируется, а удаление его данных
+        выполняется фоновой задачей. Выход из системы при удалении
+        себя выполняет djoser до вызова этого метода.
+        """
+        instance.is_active = False
+        instance.save(update_fields=['is_active'])
+        delete_user.enqueue(user_id=instance.pk)
+
     @action(
         detail=False,
         methods=['get'],
@@ -40,14 +101,21 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def subscribe(self, request, id):
-        """Добавление подписок."""
+        """
+        Добавление подписок одним INSERT без предварительной проверки:
+        повторная подписка, в том числе при гонке двойного нажатия,
+        отклоняется по ограничению уникальности.
+        """
         user = request.user
         author = get_object_or_404(User, id=id)
-        serializer = SubscriptionCreateSerializer(
-            data={'user': user.id, 'author': author.id}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        if author == user:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Подписаться на самого себя нельзя.'
+            ]})
+        if not add_relation(Subscription, user=user, author=author):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                get_unique_message(SubscriptionCreateSerializer)
+            ]})
         serializer = SubscriptionSerializer(
             author, context={'request': request}
         )
@@ -55,17 +123,19 @@ class CustomUserViewSet(UserViewSet):
 
     @subscribe.mapping.delete
     def unsubscribe(self, request, id):
-        """Удаление подписок."""
-        user = request.user
-        author = get_object_or_404(User, id=id)
-        subscription = Subscription.objects.filter(user=user, author=author)
-        if not subscription.exists():
-            return Response(
-                {'errors': 'Вы не подписаны на данного автора.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        subscription.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        """
+        Удаление подписок без выборки автора; автор ищется, только
+        если удалять было нечего, чтобы отличить 404 от 400.
+        """
+        if remove_relation(
+            Subscription, user=request.user, author_id=parse_pk(id)
+        ):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User.objects.only('id'), id=id)
+        return Response(
+            {'errors': 'Вы не подписаны на данного автора.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     @action(
         detail=False,
@@ -75,7 +145,9 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Получение информации о подписках."""
         user = request.user
-        queryset = User.objects.filter(following__user=user)
+        queryset = self.annotate_is_subscribed(
+            User.objects.filter(following__user=user), user
+        )
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(
             pages,
@@ -91,7 +163,11 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     pagination_class = None
     filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
+
+    def list(self, request, *args, **kwargs):
+        return Response(IngredientValuesSerializer().serialize(
+            self.filter_queryset(self.get_queryset())
+        ))
 
 
 class TagViewSet(ReadOnlyModelViewSet):
@@ -100,6 +176,9 @@ class TagViewSet(ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(TagValuesSerializer().serialize(self.get_queryset()))
+
 
 class RecipeViewSet(ModelViewSet):
 
@@ -108,30 +187,223 @@ class RecipeViewSet(ModelViewSet):
     filterset_class = RecipeFilter
     search_fields = ('name', 'text')
     permission_classes = (IsAuthorOrAdminOrReadOnly,)
+    throttle_scopes = {
+        'create': 'upload',
+        'update': 'upload',
+        'partial_update': 'upload',
+        'bulk': 'bulk',
+        'download_shopping_cart': 'export',
+    }
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
         return RecipeCreateSerializer
 
+    @transaction.atomic
+    def perform_create(self, serializer):
+        """
+        Рецепт с тегами и ингредиентами создаётся в одной транзакции
+        с событиями журнала изменений.
+        """
+        super().perform_create(serializer)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+    @staticmethod
+    def parse_names(request, param, allowed):
+        """Список имён из параметра запроса; None, если его нет."""
+        if param not in request.query_params:
+            return None
+        names = [
+            name.strip()
+            for name in request.query_params[param].split(',')
+            if name.strip()
+        ]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise ValidationError({param: (
+                f'Неизвестные значения: {", ".join(unknown)}. '
+                f'Допустимые: {", ".join(allowed)}.'
+            )})
+        return names
+
+    def get_sparse_fields(self):
+        """
+        Поля рецепта из ?fields= и раскрываемые связи из ?expand=;
+        без параметров выводятся все поля со всеми связями.
+        """
+        if not hasattr(self, '_sparse_fields'):
+            fields = self.parse_names(
+                self.request, 'fields', RecipeSerializer.Meta.fields
+            )
+            expand = self.parse_names(
+                self.request, 'expand', RecipeSerializer.EXPANDABLE
+            )
+            self._sparse_fields = (
+                RecipeSerializer.Meta.fields if fields is None else fields,
+                RecipeSerializer.EXPANDABLE if expand is None else expand,
+            )
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method == 'GET':
+            context['fields'], context['expand'] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        """
+        Для чтения выбираются только нужные запрошенным полям столбцы,
+        связи и признаки пользователя.
+        """
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        fields, expand = self.get_sparse_fields()
+        user = self.request.user
+        queryset = queryset.only('id', *(
+            field
+            for field in ('name', 'image', 'text', 'cooking_time', 'author')
+            if field in fields
+        ))
+        if 'author' in fields:
+            if 'author' in expand:
+                queryset = queryset.prefetch_related(Prefetch(
+                    'author',
+                    queryset=CustomUserViewSet.annotate_is_subscribed(
+                        User.objects.all(), user
+                    ),
+                ))
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related(
+                'tags' if 'tags' in expand else Prefetch(
+                    'tags', queryset=Tag.objects.only('id')
+                )
+            )
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'recipe_ingredients',
+                    queryset=IngredientRecipe.objects.select_related(
+                        'ingredient'
+                    ),
+                ) if 'ingredients' in expand else 'recipe_ingredients'
+            )
+        if user.is_authenticated:
+            if 'is_favorited' in fields:
+                queryset = queryset.annotate(is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ))
+            if 'is_in_shopping_cart' in fields:
+                queryset = queryset.annotate(is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ))
+        return queryset
+
+    def get_requested_ids(self):
+        """id рецептов из ?ids=1,2,3 без повторов; None, если их нет."""
+        if 'ids' not in self.request.query_params:
+            return None
+        try:
+            ids = [
+                int(pk) for pk in self.request.query_params['ids'].split(',')
+                if pk.strip()
+            ]
+        except ValueError:
+            raise ValidationError({'ids': 'Ожидаются id через запятую.'})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_RECIPE_IDS:
+            raise ValidationError({'ids': (
+                f'Можно запросить не больше {MAX_RECIPE_IDS} рецептов.'
+            )})
+        return ids
+
+    def list(self, request, *args, **kwargs):
+        ids = self.get_requested_ids()
+        queryset = self.filter_queryset(Recipe.objects.all())
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return conditional_response(
+            request,
+            get_recipe_list_validators(request, queryset),
+            lambda: (
+                super(RecipeViewSet, self).list(request, *args, **kwargs)
+                if ids is None else self.multi_get(ids)
+            )
+        )
+
+    def multi_get(self, ids):
+        """
+        Рецепты по списку id одним запросом в запрошенном порядке;
+        вместо отсутствующих - {"id": ..., "not_found": true}.
+        """
+        recipes = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True
+        )
+        found = iter(serializer.data)
+        return Response([
+            next(found) if pk in recipes else {'id': pk, 'not_found': True}
+            for pk in ids
+        ])
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            get_recipe_detail_validators(request, kwargs['pk']),
+            lambda: super(RecipeViewSet, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
     @staticmethod
     def post_for_actions(request, pk, serializers):
-        data = {'user': request.user.id, 'recipe': pk}
-        serializer = serializers(data=data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        """
+        Добавление рецепта в избранное или корзину: выборка рецепта
+        для ответа и один INSERT, повтор отклоняется по ограничению
+        уникальности, а не предварительной проверкой.
+        """
+        model = serializers.Meta.model
+        messages = PrimaryKeyRelatedField.default_error_messages
+        if not str(pk).isdigit():
+            raise ValidationError({'recipe': [
+                messages['incorrect_type'].format(data_type='str')
+            ]})
+        recipe = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time'
+        ).filter(pk=pk).first()
+        if recipe is None:
+            raise ValidationError({'recipe': [
+                messages['does_not_exist'].format(pk_value=pk)
+            ]})
+        if not add_relation(model, user=request.user, recipe=recipe):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                get_unique_message(serializers)
+            ]})
+        serializer = serializers(
+            model(user=request.user, recipe=recipe),
+            context={'request': request},
+        )
         return Response(
             serializer.data, status=status.HTTP_201_CREATED
         )
 
     @staticmethod
     def delete_for_actions(request, pk, model):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
-        obj = model.objects.filter(user=user, recipe=recipe)
-        if obj.exists():
-            obj.delete()
+        """
+        Удаление без выборки рецепта; рецепт ищется, только если
+        удалять было нечего, чтобы отличить 404 от 400.
+        """
+        if remove_relation(
+            model, user=request.user, recipe_id=parse_pk(pk)
+        ):
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe.objects.only('id'), id=pk)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     @action(
@@ -174,6 +446,94 @@ class RecipeViewSet(ModelViewSet):
             model=ShoppingCart
         )
 
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk(self, request):
+        """
+        Пакетное создание рецептов. Ингредиенты и теги всего пакета
+        проверяются одним запросом каждые, корректные рецепты
+        создаются в одной транзакции, ошибки возвращаются по каждому
+        рецепту отдельно, не отменяя остальные.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Ожидается непустой список рецептов.'
+            ]})
+        if len(items) > MAX_BULK_RECIPES:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Можно загрузить не больше {MAX_BULK_RECIPES} рецептов.'
+            ]})
+        ingredient_ids, tag_ids = RecipeBulkItemSerializer.get_referenced_ids(
+            items
+        )
+        context = {
+            **self.get_serializer_context(),
+            'ingredient_ids': set(Ingredient.objects.filter(
+                id__in=ingredient_ids
+            ).values_list('id', flat=True)),
+            'tag_ids': set(Tag.objects.filter(
+                id__in=tag_ids
+            ).values_list('id', flat=True)),
+        }
+        results = []
+        valid = []
+        for item in items:
+            serializer = RecipeBulkItemSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+                results.append(None)
+            else:
+                results.append({'errors': serializer.errors})
+        if valid:
+            with transaction.atomic(), explicit_recording():
+                recipes = iter(RecipeBulkItemSerializer.bulk_create(
+                    valid, request.user
+                ))
+            reset_facets()
+            results = [
+                result or {'id': next(recipes).pk} for result in results
+            ]
+        return Response(
+            results,
+            status=(
+                status.HTTP_201_CREATED if valid
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+    def get_throttle_cost(self, request):
+        """Пакетная загрузка расходует по токену на каждый рецепт."""
+        if self.action == 'bulk' and isinstance(request.data, list):
+            return min(len(request.data), MAX_BULK_RECIPES)
+        return 1
+
+    def get_facets_queryset(self):
+        """Рецепты по фильтрам запроса, кроме фильтра по тегам."""
+        params = self.request.query_params.copy()
+        params.pop('tags', None)
+        filterset = self.filterset_class(
+            params, queryset=Recipe.objects.all(), request=self.request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filters.SearchFilter().filter_queryset(
+            self.request, filterset.qs, self
+        )
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Количество рецептов по каждому тегу для текущих фильтров
+        (автор, избранное, корзина, поиск) без учёта выбранных тегов.
+        """
+        return Response(
+            get_cached_tag_counts(request, self.get_facets_queryset)
+        )
+
     @action(
         detail=False,
         methods=['get'],
@@ -206,3 +566,27 @@ class RecipeViewSet(ModelViewSet):
         response = HttpResponse(shopping_list, content_type='text/plain')
         response['Content-Disposition'] = f'attachment; filename={file_name}'
         return response
+
+
+def metrics(request):
+    """
+    Метрики процесса в текстовом формате Prometheus.
+
+    Без заголовка Authorization с METRICS_TOKEN отвечает 401; без
+    заданного токена метрики открыты только в режиме DEBUG.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        allowed = constant_time_compare(
+            request.headers.get('Authorization', ''), expected
+        )
+    else:
+        allowed = settings.DEBUG
+    if not allowed:
+        response = HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,216 @@
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import registry
+
+REQUESTS_METRIC = 'foodgram_cache_requests_total'
+REQUESTS_HELP = 'Обращения к двухуровневому кешу по уровням.'
+RECOMPUTES_METRIC = 'foodgram_cache_recomputes_total'
+RECOMPUTES_HELP = 'Пересчёты значений двухуровневого кеша.'
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кеш: ограниченный LRU в памяти процесса с коротким
+    сроком жизни перед общим кешем (LOCATION - его алиас в CACHES).
+    Ключи в общем кеше получают префикс KEY_PREFIX этого кеша.
+
+    get_or_set() защищает от лавины пересчётов: одновременные промахи
+    по ключу в процессе ждут одного вычисления, а значение
+    пересчитывается заранее с вероятностью, растущей к концу срока
+    (XFetch), пока остальные потоки получают прежнее. Между процессами
+    вычисление захватывается блокировкой в общем кеше, поэтому
+    LOCATION должен указывать на кеш, общий для всех процессов
+    (см. foodgram.checks); с LocMemCache каждый процесс считает сам.
+
+    Счётчики incr() неатомарны, поэтому кеш предназначен для
+    производных значений; счётчики и блокировки - в общем кеше.
+
+    OPTIONS: MAX_ENTRIES - размер локального уровня, LOCAL_TIMEOUT -
+    срок жизни в нём (с), BETA - агрессивность раннего пересчёта,
+    LOCK_TIMEOUT - срок блокировки пересчёта (с).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location or 'default'
+        self.local_timeout = float(options.get('LOCAL_TIMEOUT', 5))
+        self.beta = float(options.get('BETA', 1.0))
+        self.lock_timeout = float(options.get('LOCK_TIMEOUT', 10))
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    @staticmethod
+    def count(tier, result):
+        registry.inc(REQUESTS_METRIC, REQUESTS_HELP, tier=tier, result=result)
+
+    def get_local(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None:
+                data, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.local.move_to_end(key)
+                    return pickle.loads(data)
+                del self.local[key]
+        return None
+
+    def set_local(self, key, envelope):
+        expires_at = time.monotonic() + self.local_timeout
+        if envelope[1] is not None:
+            expires_at = min(
+                expires_at, time.monotonic() + envelope[1] - time.time()
+            )
+        data = pickle.dumps(envelope, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.local[key] = (data, expires_at)
+            self.local.move_to_end(key)
+            while len(self.local) > self._max_entries:
+                self.local.popitem(last=False)
+
+    def get_envelope(self, key, version=None):
+        """(значение, момент истечения, время вычисления) или None."""
+        key = self.make_key(key, version)
+        envelope = self.get_local(key)
+        if envelope is not None:
+            self.count('local', 'hit')
+            return envelope
+        self.count('local', 'miss')
+        envelope = self.shared.get(key)
+        if envelope is None or (
+            envelope[1] is not None and envelope[1] <= time.time()
+        ):
+            self.count('shared', 'miss')
+            return None
+        self.count('shared', 'hit')
+        self.set_local(key, envelope)
+        return envelope
+
+    def make_envelope(self, value, timeout, delta=0.0):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        expires_at = None if timeout is None else time.time() + timeout
+        return (value, expires_at, delta), timeout
+
+    def get(self, key, default=None, version=None):
+        envelope = self.get_envelope(key, version)
+        return default if envelope is None else envelope[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            delta=0.0):
+        envelope, timeout = self.make_envelope(value, timeout, delta)
+        key = self.make_key(key, version)
+        self.shared.set(key, envelope, timeout)
+        self.set_local(key, envelope)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        envelope, timeout = self.make_envelope(value, timeout)
+        key = self.make_key(key, version)
+        if not self.shared.add(key, envelope, timeout):
+            return False
+        self.set_local(key, envelope)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        envelope = self.get_envelope(key, version)
+        if envelope is None:
+            return False
+        self.set(key, envelope[0], timeout, version, envelope[2])
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version)
+        with self.lock:
+            self.local.pop(key, None)
+        return self.shared.delete(key)
+
+    def has_key(self, key, version=None):
+        return self.get_envelope(key, version) is not None
+
+    def clear(self):
+        """Очистка локального уровня; общий кеш очищается отдельно."""
+        with self.lock:
+            self.local.clear()
+
+    def is_fresh(self, envelope):
+        """
+        XFetch: значение считается устаревшим раньше срока с вероятностью,
+        растущей по мере приближения к нему и с длительностью пересчёта.
+        """
+        _, expires_at, delta = envelope
+        if expires_at is None:
+            return True
+        early = delta * self.beta * -math.log(1.0 - random.random())
+        return time.time() + early < expires_at
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        При промахе потоки ждут одного вычисления; при раннем пересчёте
+        его выполняет один поток, остальные сразу получают прежнее
+        значение.
+        """
+        envelope = self.get_envelope(key, version)
+        if envelope is not None and self.is_fresh(envelope):
+            return envelope[0]
+        local_key = self.make_key(key, version)
+        with self.lock:
+            flight = self.flights.setdefault(
+                local_key, [threading.Lock(), 0]
+            )
+            flight[1] += 1
+        try:
+            if not flight[0].acquire(blocking=envelope is None):
+                return envelope[0]
+            try:
+                return self.recompute(key, default, timeout, version)
+            finally:
+                flight[0].release()
+        finally:
+            with self.lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self.flights[local_key]
+
+    def recompute(self, key, default, timeout, version):
+        """Вычисление значения одним потоком на все процессы."""
+        envelope = self.get_envelope(key, version)
+        if envelope is not None and self.is_fresh(envelope):
+            return envelope[0]
+        lock_key = self.make_key(f'{key}:recompute', version)
+        locked = self.shared.add(lock_key, True, self.lock_timeout)
+        if not locked:
+            if envelope is not None:
+                return envelope[0]
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                envelope = self.get_envelope(key, version)
+                if envelope is not None:
+                    return envelope[0]
+        registry.inc(
+            RECOMPUTES_METRIC, RECOMPUTES_HELP,
+            reason='miss' if envelope is None else 'early',
+        )
+        try:
+            started = time.perf_counter()
+            value = default() if callable(default) else default
+            self.set(
+                key, value, timeout, version, time.perf_counter() - started
+            )
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+        return value
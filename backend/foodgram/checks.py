@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Кеши, которые видит только свой процесс.
+PROCESS_LOCAL_BACKENDS = frozenset({
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+})
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Кеш default должен быть общим для всех процессов: в нём хранятся
+    ограничения частоты запросов, кеш токенов с отзывом при выходе,
+    версии счётчиков и блокировки пересчёта. Кеш в памяти процесса
+    допустим только в режиме DEBUG.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Error(
+        f'Кеш default ({backend}) не общий для процессов.',
+        hint=(
+            'Задайте CACHE_BACKEND и CACHE_LOCATION, например '
+            'django.core.cache.backends.memcached.PyMemcacheCache '
+            'и cache:11211.'
+        ),
+        id='foodgram.E001',
+    )]
@@ -8,6 +8,19 @@ MAX_TAG_SLUG_LENGTH = 200
 MAX_RECIPE_NAME_LENGTH = 200
 MIN_COOKING_TIME_IN_MINUTES = 1
 MIN_INGREDIENTS_AMOUNT = 1
+MAX_TAG_BITS = 63
 
 FORBIDDEN_USERNAMES = ['me']
 MAX_NAME_LENGTH = 150
+
+MAX_JOB_TASK_LENGTH = 100
+MAX_JOB_WORKER_LENGTH = 100
+DELETION_BATCH_SIZE = 1000
+MAX_INGREDIENT_SEARCH_RESULTS = 50
+# Доля триграмм запроса, которая должна найтись в названии
+# (word_similarity_threshold в pg_trgm).
+INGREDIENT_SEARCH_THRESHOLD = 0.6
+MAX_RECIPE_IDS = 100
+MAX_BULK_RECIPES = 100
+MAX_CHANGE_MODEL_LENGTH = 100
+MAX_CONSUMER_NAME_LENGTH = 100
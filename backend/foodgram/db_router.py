@@ -0,0 +1,54 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Модели, которые читаются только из основной базы: токен, выданный
+# при входе, должен работать сразу, не дожидаясь репликации, а очередь
+# фоновых задач не должна захватывать уже выполненные задачи,
+# а потребители журнала изменений - пропускать отстающие события.
+PRIMARY_ONLY_MODELS = frozenset({
+    'authtoken.token', 'jobs.job', 'outbox.changeevent', 'outbox.checkpoint',
+})
+
+_replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+
+@contextmanager
+def replica_reads(allowed=True):
+    """Разрешение (или запрет) чтения с реплик внутри блока."""
+    token = _replica_reads_allowed.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads_allowed.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Маршрутизатор запросов между основной базой данных и репликами.
+
+    Запись всегда идёт в основную базу. Чтение уходит на одну из реплик
+    только в том случае, если это явно разрешено для текущего запроса
+    (см. ReplicaRoutingMiddleware) и нет открытой транзакции.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not _replica_reads_allowed.get()
+            or model._meta.label_lower in PRIMARY_ONLY_MODELS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,190 @@
+import bisect
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SLOWEST_QUERIES_KEPT = 3
+
+
+def escape_label(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape_label(value)}"' for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    """Счётчик с метками."""
+
+    type_name = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{format_labels(labels)} {value}'
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, labels, value):
+        counts, total = self.values.get(
+            labels, ([0] * (len(self.buckets) + 1), 0)
+        )
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values[labels] = (counts, total + value)
+
+    def render(self):
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                bucket_labels = format_labels(labels + (('le', bound),))
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            yield f'{self.name}_sum{format_labels(labels)} {total}'
+            yield f'{self.name}_count{format_labels(labels)} {cumulative}'
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def counter(self, name, help_text):
+        return self.metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        return self.metrics.setdefault(
+            name, Histogram(name, help_text, buckets)
+        )
+
+    def inc(self, name, help_text, amount=1, **labels):
+        with self.lock:
+            self.counter(name, help_text).inc(
+                tuple(sorted(labels.items())), amount
+            )
+
+    def observe(self, name, help_text, value, buckets=DURATION_BUCKETS,
+                **labels):
+        with self.lock:
+            self.histogram(name, help_text, buckets).observe(
+                tuple(sorted(labels.items())), value
+            )
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, metric in sorted(self.metrics.items()):
+                lines.append(f'# HELP {name} {metric.help_text}')
+                lines.append(f'# TYPE {name} {metric.type_name}')
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Показатели одного запроса: SQL, сериализация и общее время."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.slowest_queries = []
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += duration
+            entry = (duration, self.query_count, sql)
+            if len(self.slowest_queries) < SLOWEST_QUERIES_KEPT:
+                heapq.heappush(self.slowest_queries, entry)
+            else:
+                heapq.heappushpop(self.slowest_queries, entry)
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Сбор показателей запроса внутри блока."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Учёт времени сериализации.
+
+    Вложенные сериализаторы не учитываются повторно: время считается
+    только для внешнего вызова.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
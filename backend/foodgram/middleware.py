@@ -0,0 +1,288 @@
+import cProfile
+import hashlib
+import logging
+import os
+import random
+import re
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+from . import metrics
+from .db_router import replica_reads
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_TOKEN_SALT = 'foodgram.profiling'
+
+logger = logging.getLogger('foodgram.performance')
+
+
+class MetricsMiddleware:
+    """
+    Замер количества SQL-запросов, времени работы с базой, времени
+    сериализации и общего времени обработки запроса.
+
+    Результат добавляется в заголовок Server-Timing, накапливается
+    в гистограммах по представлениям (см. /api/metrics/), а медленные
+    запросы пишутся в журнал вместе с самыми долгими SQL-запросами.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.collect() as collected, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collected))
+            response = self.get_response(request)
+        total_time = collected.total_time
+        view = self.get_view_name(request)
+        self.observe(request, response, view, collected, total_time)
+        if settings.SERVER_TIMING_ENABLED:
+            response['Server-Timing'] = (
+                f'db;dur={collected.db_time * 1000:.1f};'
+                f'desc="{collected.query_count} queries", '
+                f'serializer;dur={collected.serializer_time * 1000:.1f}, '
+                f'total;dur={total_time * 1000:.1f}'
+            )
+        if (
+            total_time * 1000 >= settings.SLOW_REQUEST_MS
+            or collected.query_count >= settings.SLOW_REQUEST_QUERIES
+        ):
+            self.log_slow_request(request, view, collected, total_time)
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        match = request.resolver_match
+        return match.view_name if match else 'unmatched'
+
+    @staticmethod
+    def observe(request, response, view, collected, total_time):
+        metrics.registry.inc(
+            'foodgram_requests_total',
+            'Количество обработанных запросов.',
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        metrics.registry.observe(
+            'foodgram_request_duration_seconds',
+            'Общее время обработки запроса.',
+            total_time,
+            view=view,
+        )
+        metrics.registry.observe(
+            'foodgram_request_db_seconds',
+            'Время выполнения SQL-запросов за запрос.',
+            collected.db_time,
+            view=view,
+        )
+        metrics.registry.observe(
+            'foodgram_request_serializer_seconds',
+            'Время сериализации ответа.',
+            collected.serializer_time,
+            view=view,
+        )
+        metrics.registry.observe(
+            'foodgram_request_queries',
+            'Количество SQL-запросов за запрос.',
+            collected.query_count,
+            buckets=metrics.QUERY_COUNT_BUCKETS,
+            view=view,
+        )
+
+    @staticmethod
+    def log_slow_request(request, view, collected, total_time):
+        slowest = '\n'.join(
+            f'  {duration * 1000:.1f} ms: {sql}'
+            for duration, _, sql in sorted(
+                collected.slowest_queries, reverse=True
+            )
+        )
+        logger.warning(
+            'Медленный запрос %s %s (%s): %.1f ms, SQL-запросов: %d '
+            '(%.1f ms), сериализация: %.1f ms\n%s',
+            request.method,
+            request.path,
+            view,
+            total_time * 1000,
+            collected.query_count,
+            collected.db_time * 1000,
+            collected.serializer_time * 1000,
+            slowest,
+        )
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжатие gzip только для ответов не короче GZIP_MIN_LENGTH байт."""
+
+    def process_response(self, request, response):
+        if (
+            not response.streaming
+            and len(response.content) < settings.GZIP_MIN_LENGTH
+        ):
+            return response
+        return super().process_response(request, response)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Направление безопасных запросов на реплики базы данных.
+
+    После успешного изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    закрепляется за основной базой (cookie для браузера и ключ в кеше
+    для клиентов с токеном), чтобы сразу видеть свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica = (
+            request.method in SAFE_METHODS
+            and not self.is_pinned(request)
+        )
+        with replica_reads(use_replica):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    @staticmethod
+    def get_pin_key(request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        return f'primary-pin:{digest}'
+
+    def is_pinned(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return True
+        if settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            return True
+        key = self.get_pin_key(request)
+        return key is not None and cache.get(key, False)
+
+    def pin(self, request, response):
+        if not settings.DATABASE_REPLICAS:
+            return
+        response.set_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            '1',
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+        key = self.get_pin_key(request)
+        if key is not None:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def make_profile_token(memory=False):
+    """Подписанное значение заголовка X-Profile."""
+    return signing.dumps({'memory': memory}, salt=PROFILE_TOKEN_SALT)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельных запросов через cProfile и, по желанию,
+    tracemalloc.
+
+    Профилируется запрос с заголовком X-Profile от сотрудника
+    (значение cpu или memory) или с подписанным значением
+    (make_profile_token), а также доля PROFILING_SAMPLE_RATE всех
+    запросов. Результаты пишутся в PROFILING_DIR в файлы с временем
+    и именем представления; без PROFILING_DIR middleware отключён.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self.get_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        memory = mode == 'memory' and not tracemalloc.is_tracing()
+        if memory:
+            tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+            snapshot = None
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+        name = self.save(request, profile, snapshot)
+        response['X-Profile-File'] = name
+        return response
+
+    def get_mode(self, request):
+        """cpu, memory или None, если запрос не профилируется."""
+        value = request.META.get(PROFILE_HEADER)
+        if value:
+            try:
+                options = signing.loads(
+                    value,
+                    salt=PROFILE_TOKEN_SALT,
+                    max_age=settings.PROFILING_TOKEN_MAX_AGE,
+                )
+            except signing.BadSignature:
+                if value in ('cpu', 'memory') and self.is_staff(request):
+                    return value
+            else:
+                return 'memory' if options.get('memory') else 'cpu'
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'memory' if settings.PROFILING_TRACEMALLOC else 'cpu'
+        return None
+
+    @staticmethod
+    def is_staff(request):
+        """Сотрудник по сессии или по токену из заголовка Authorization."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication().authenticate(request)
+            except APIException:
+                return False
+            if result is not None:
+                return result[0].is_staff
+        return False
+
+    @staticmethod
+    def save(request, profile, snapshot):
+        match = request.resolver_match
+        view = re.sub(
+            r'[^\w.-]+', '_', match.view_name if match else 'unmatched'
+        )
+        name = (
+            f'{timezone.now():%Y%m%d-%H%M%S-%f}-{view}-'
+            f'{request.method.lower()}-{os.getpid()}'
+        )
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_DIR, name)
+        profile.dump_stats(f'{path}.prof')
+        if snapshot is not None:
+            snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            )).dump(f'{path}.tracemalloc')
+        return name
@@ -31,9 +31,13 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
+    'outbox.apps.OutboxConfig',
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.MetricsMiddleware',
+    'foodgram.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +46,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'foodgram.middleware.ProfilingMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -64,10 +70,15 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# Тестовая база SQLite - файл, а не база в памяти, и запись ждёт
+# освобождения блокировки: иначе одновременные запросы в тестах
+# (api.tests.test_relations) отклоняются ошибкой блокировки таблицы.
 SQLITE = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'timeout': int(os.getenv('SQLITE_TIMEOUT', 20))},
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -84,6 +95,94 @@ POSTGRESQL = {
 
 DATABASES = SQLITE if DEBUG else POSTGRESQL
 
+# Реплики только для чтения: имена файлов SQLite (в режиме DEBUG)
+# или хосты PostgreSQL, перечисленные через запятую.
+SQLITE_REPLICAS = [
+    name for name in os.getenv('SQLITE_REPLICAS', '').split(',') if name
+]
+POSTGRES_REPLICA_HOSTS = [
+    host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host
+]
+
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    SQLITE_REPLICAS if DEBUG else POSTGRES_REPLICA_HOSTS, start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DEBUG:
+        DATABASES[alias]['NAME'] = BASE_DIR / replica
+    else:
+        DATABASES[alias]['HOST'] = replica
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db_router.PrimaryReplicaRouter']
+
+# Общий для всех процессов кеш (например, PyMemcacheCache) нужен, чтобы
+# ограничения частоты запросов и закрепления за основной базой
+# действовали на всех воркерах и узлах.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Производные значения: LRU в памяти процесса перед общим кешем
+    # с защитой от одновременных пересчётов (см. foodgram.cache);
+    # между процессами защита работает, только если default - общий.
+    'tiered': {
+        'BACKEND': 'foodgram.cache.TieredCache',
+        'LOCATION': 'default',
+        'KEY_PREFIX': 'tiered',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', 1000)),
+            'LOCAL_TIMEOUT': int(os.getenv('LOCAL_CACHE_TIMEOUT', 5)),
+        },
+    },
+}
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+# Метрики хранятся в памяти процесса и не суммируются между процессами:
+# /api/metrics/ отдаёт данные того воркера, который принял запрос.
+# Поэтому каждая цель сбора Prometheus - отдельный контейнер с одним
+# воркером gunicorn (как в Dockerfile); масштабирование - числом
+# контейнеров, а не --workers.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+GZIP_MIN_LENGTH = int(os.getenv('GZIP_MIN_LENGTH', 1024))
+
+# Профилирование запросов: каталог для результатов (пустой - выключено),
+# доля случайных запросов и запись снимков памяти для них.
+PROFILING_DIR = os.getenv('PROFILING_DIR', '')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_TRACEMALLOC = os.getenv('PROFILING_TRACEMALLOC', 'False') == 'True'
+PROFILING_TRACEMALLOC_FRAMES = 10
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', 3600))
+
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+# Задержка перед повтором удваивается с каждой попыткой.
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 10))
+JOB_RETRY_MAX_DELAY = int(os.getenv('JOB_RETRY_MAX_DELAY', 3600))
+# Задача, захват которой не продлевался дольше этого срока, считается
+# брошенной; обработчик продлевает захват каждую треть срока.
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 900))
+
+# Журнал изменений: размер пачки потребителя и время с момента, когда
+# потребитель заметил пропуск в id событий, после которого пропуск
+# считается откатившейся транзакцией. Момент хранится в позиции
+# потребителя по часам базы и переживает перезапуски.
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+OUTBOX_GAP_TIMEOUT = int(os.getenv('OUTBOX_GAP_TIMEOUT', 60))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -124,12 +223,45 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.getenv('THROTTLE_RATE_READ', '600/min'),
+        'write': os.getenv('THROTTLE_RATE_WRITE', '120/min'),
+        'upload': os.getenv('THROTTLE_RATE_UPLOAD', '20/min'),
+        'export': os.getenv('THROTTLE_RATE_EXPORT', '10/min'),
+        # Рецептов в пакетной загрузке; не меньше MAX_BULK_RECIPES.
+        'bulk': os.getenv('THROTTLE_RATE_BULK', '200/min'),
+    },
+    # Сколько прокси (nginx) добавляют адрес в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
     'DEFAULT_PAGINATION_CLASS': 'api.paginations.CustomPagination',
     'PAGE_SIZE': 6,
 }
 
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+
+# Как часто перестраивать индекс поиска ингредиентов в памяти (без pg_trgm).
+INGREDIENT_SEARCH_INDEX_TTL = int(
+    os.getenv('INGREDIENT_SEARCH_INDEX_TTL', 600)
+)
+
+# Срок хранения счётчиков рецептов по тегам; при изменении данных
+# они сбрасываются раньше.
+RECIPE_FACETS_CACHE_TTL = int(os.getenv('RECIPE_FACETS_CACHE_TTL', 300))
+
 DJOSER = {
     'LOGIN-FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from foodgram.cache import TieredCache
+
+
+def make_cache(**options):
+    return TieredCache('default', {'KEY_PREFIX': 'test', 'OPTIONS': options})
+
+
+class TieredCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lru_eviction(self):
+        tiered = make_cache(MAX_ENTRIES=2)
+        tiered.set('a', 1)
+        tiered.set('b', 2)
+        tiered.get('a')
+        tiered.set('c', 3)
+        self.assertEqual(
+            list(tiered.local),
+            [tiered.make_key('a'), tiered.make_key('c')],
+        )
+        self.assertEqual(tiered.get('b'), 2)
+
+    def test_local_expiry(self):
+        tiered = make_cache(LOCAL_TIMEOUT=0.05)
+        tiered.set('key', 1)
+        cache.delete(tiered.make_key('key'))
+        self.assertEqual(tiered.get('key'), 1)
+        time.sleep(0.1)
+        self.assertIsNone(tiered.get('key'))
+
+    def test_expiry(self):
+        tiered = make_cache()
+        tiered.set('key', 1, timeout=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(tiered.get('key'))
+        self.assertEqual(tiered.get_or_set('key', 2), 2)
+
+    def test_single_flight(self):
+        tiered = make_cache()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        def worker():
+            results.append(tiered.get_or_set('key', compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_other_process_recomputes(self):
+        tiered, other = make_cache(), make_cache()
+        cache.add(tiered.make_key('key:recompute'), True, 10)
+
+        def finish():
+            time.sleep(0.1)
+            other.set('key', 'other')
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        self.assertEqual(tiered.get_or_set('key', 'own', 60), 'other')
+        thread.join()
+
+    def test_early_refresh_returns_stale(self):
+        # Время прошлого вычисления велико, поэтому значение
+        # всегда пересчитывается заранее.
+        tiered = make_cache(BETA=1000)
+        tiered.set('key', 'old', 60, delta=10)
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return 'new'
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                tiered.get_or_set('key', compute, 60)
+            )
+        )
+        thread.start()
+        self.assertTrue(started.wait(5))
+        self.assertEqual(tiered.get_or_set('key', lambda: 'other', 60), 'old')
+        release.set()
+        thread.join()
+        self.assertEqual(results, ['new'])
+        self.assertEqual(tiered.get('key'), 'new')
+
+    def test_early_refresh_locked_elsewhere(self):
+        tiered = make_cache(BETA=1000)
+        tiered.set('key', 'old', 60, delta=10)
+        cache.add(tiered.make_key('key:recompute'), True, 10)
+        self.assertEqual(tiered.get_or_set('key', lambda: 'new', 60), 'old')
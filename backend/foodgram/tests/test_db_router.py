@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.http import HttpResponse
+from django.core.cache import cache
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+
+from foodgram.db_router import PrimaryReplicaRouter, replica_reads
+from foodgram.middleware import ReplicaRoutingMiddleware
+from jobs.models import Job
+from recipes.models import Recipe
+
+REPLICAS = ['replica_1']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class PrimaryReplicaRouterTest(TransactionTestCase):
+    # Без обёртки теста в транзакцию: внутри неё реплики не используются.
+    router = PrimaryReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_allowed_reads_use_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+
+    def test_primary_only_models(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Job), 'default')
+
+    def test_reads_inside_transaction_use_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_writes_use_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingMiddlewareTest(SimpleTestCase):
+    factory = RequestFactory()
+
+    def setUp(self):
+        cache.clear()
+        self.routed = []
+
+        def get_response(request):
+            self.routed.append(PrimaryReplicaRouter().db_for_read(Recipe))
+            return HttpResponse(status=self.status)
+
+        self.status = 200
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def test_safe_request_uses_replica(self):
+        self.middleware(self.factory.get('/api/recipes/'))
+        self.assertEqual(self.routed, ['replica_1'])
+
+    def test_unsafe_request_uses_primary_and_pins(self):
+        response = self.middleware(self.factory.post('/api/recipes/'))
+        self.assertEqual(self.routed, ['default'])
+        self.assertIn('primary_pin', response.cookies)
+
+    def test_pinned_by_cookie(self):
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES['primary_pin'] = '1'
+        self.middleware(request)
+        self.assertEqual(self.routed, ['default'])
+
+    def test_pinned_by_token(self):
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+        self.middleware(self.factory.post('/api/recipes/', **auth))
+        self.middleware(self.factory.get('/api/recipes/', **auth))
+        self.middleware(self.factory.get('/api/recipes/'))
+        self.assertEqual(self.routed, ['default', 'default', 'replica_1'])
+
+    def test_failed_write_does_not_pin(self):
+        self.status = 400
+        auth = {'HTTP_AUTHORIZATION': 'Token abc'}
+        response = self.middleware(self.factory.post('/api/recipes/', **auth))
+        self.assertNotIn('primary_pin', response.cookies)
+        self.middleware(self.factory.get('/api/recipes/', **auth))
+        self.assertEqual(self.routed[-1], 'replica_1')
@@ -0,0 +1,91 @@
+import re
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from foodgram.metrics import Registry
+
+METRICS_URL = '/api/metrics/'
+
+
+class RegistryTest(SimpleTestCase):
+
+    def test_histogram_exposition(self):
+        registry = Registry()
+        for value in (0.5, 1, 7):
+            registry.observe(
+                'duration', 'Время.', value, buckets=(1, 5), view='a"b'
+            )
+        self.assertEqual(registry.render(), (
+            '# HELP duration Время.\n'
+            '# TYPE duration histogram\n'
+            'duration_bucket{view="a\\"b",le="1"} 2\n'
+            'duration_bucket{view="a\\"b",le="5"} 2\n'
+            'duration_bucket{view="a\\"b",le="+Inf"} 3\n'
+            'duration_sum{view="a\\"b"} 8.5\n'
+            'duration_count{view="a\\"b"} 3\n'
+        ))
+
+    def test_counter_exposition(self):
+        registry = Registry()
+        registry.inc('requests', 'Запросы.', status=200, method='GET')
+        registry.inc('requests', 'Запросы.', status=200, method='GET')
+        self.assertEqual(registry.render(), (
+            '# HELP requests Запросы.\n'
+            '# TYPE requests counter\n'
+            'requests{method="GET",status="200"} 2\n'
+        ))
+
+
+class MetricsViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            response = self.client.get(METRICS_URL, **headers)
+            self.assertEqual(response.status_code, 401)
+            self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_closed_without_token_in_production(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 401)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_open_without_token_in_debug(self):
+        self.client.get('/api/tags/')
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            '# TYPE foodgram_request_duration_seconds histogram',
+            response.content.decode(),
+        )
+        self.assertIn(
+            'foodgram_request_queries_bucket{view="tags-list",le="+Inf"}',
+            response.content.decode(),
+        )
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_server_timing(self):
+        response = self.client.get('/api/tags/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=\d+\.\d;desc="\d+ queries", '
+            r'serializer;dur=\d+\.\d, total;dur=\d+\.\d$',
+        )
+        queries = int(
+            re.search(r'"(\d+) queries"', response['Server-Timing'])[1]
+        )
+        self.assertGreaterEqual(queries, 1)
+
+    @override_settings(SERVER_TIMING_ENABLED=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get('/api/tags/')
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from foodgram.middleware import ProfilingMiddleware, make_profile_token
+from users.models import User
+
+URL = '/api/tags/'
+
+
+class ProfilingDisabledTest(SimpleTestCase):
+
+    @override_settings(PROFILING_DIR='')
+    def test_disabled_without_directory(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+
+
+class ProfilingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(
+            PROFILING_DIR=self.directory, PROFILING_SAMPLE_RATE=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def make_user(self, is_staff):
+        return User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123',
+            is_staff=is_staff,
+        )
+
+    def assert_profiled(self, response, *suffixes):
+        name = response['X-Profile-File']
+        self.assertIn('tags-list-get', name)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(f'{name}{suffix}' for suffix in suffixes),
+        )
+
+    def assert_not_profiled(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_ordinary_request_not_profiled(self):
+        self.assert_not_profiled(self.client.get(URL))
+
+    def test_staff_session(self):
+        self.client.force_login(self.make_user(is_staff=True))
+        response = self.client.get(URL, HTTP_X_PROFILE='cpu')
+        self.assert_profiled(response, '.prof')
+
+    def test_staff_token_memory(self):
+        token = Token.objects.create(user=self.make_user(is_staff=True))
+        response = self.client.get(
+            URL, HTTP_X_PROFILE='memory',
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+        self.assert_profiled(response, '.prof', '.tracemalloc')
+
+    def test_not_staff_not_profiled(self):
+        token = Token.objects.create(user=self.make_user(is_staff=False))
+        self.assert_not_profiled(self.client.get(
+            URL, HTTP_X_PROFILE='cpu',
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        ))
+        self.assert_not_profiled(self.client.get(URL, HTTP_X_PROFILE='cpu'))
+
+    def test_signed_token(self):
+        response = self.client.get(
+            URL, HTTP_X_PROFILE=make_profile_token(memory=True)
+        )
+        self.assert_profiled(response, '.prof', '.tracemalloc')
+
+    @override_settings(PROFILING_TOKEN_MAX_AGE=60)
+    def test_expired_token_not_profiled(self):
+        token = make_profile_token()
+        with mock.patch('time.time', return_value=4_000_000_000):
+            response = self.client.get(URL, HTTP_X_PROFILE=token)
+        self.assert_not_profiled(response)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request(self):
+        self.assert_profiled(self.client.get(URL), '.prof')
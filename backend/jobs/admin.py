@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'task', 'status', 'attempts', 'run_after', 'created_at', 'finished_at'
+    )
+    list_filter = ('status', 'task')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error')
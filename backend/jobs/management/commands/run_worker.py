@@ -0,0 +1,86 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from jobs.queue import claim, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработчик фоновых задач из очереди в базе данных: '
+        'несколько потоков, повторы с экспоненциальной задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Количество потоков-обработчиков.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, с.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop.set())
+        self.requeue()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(f'{prefix}:{number}', options),
+                daemon=True,
+            )
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(
+            f'Обработчик {prefix} запущен, потоков: {len(threads)}'
+        )
+        requeued_at = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=options['poll_interval'])
+            if time.monotonic() - requeued_at > settings.JOB_LOCK_TIMEOUT:
+                self.requeue()
+                requeued_at = time.monotonic()
+        self.stdout.write(self.style.SUCCESS('Обработчик остановлен.'))
+
+    def requeue(self):
+        requeued, failed = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь задач: {requeued}')
+        if failed:
+            self.stdout.write(f'Брошенных задач без попыток: {failed}')
+        connection.close()
+
+    def work(self, worker, options):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                jobs = claim(worker)
+                if not jobs:
+                    if options['once']:
+                        break
+                    self.stop.wait(options['poll_interval'])
+                    continue
+                for job in jobs:
+                    job = run(job)
+                    self.stdout.write(
+                        f'[{worker}] {job.task} #{job.pk}: {job.status}'
+                    )
+        finally:
+            connection.close()
@@ -0,0 +1,188 @@
+import datetime as dt
+import logging
+import random
+import threading
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('foodgram.jobs')
+
+TASKS = {}
+
+
+def task(name, max_attempts=None):
+    """
+    Регистрация функции как фоновой задачи.
+
+    Функция вызывается с аргументами из payload; у неё появляется
+    метод enqueue(**payload) для постановки в очередь.
+    """
+    def decorator(func):
+        if name in TASKS:
+            raise ValueError(f'Задача {name!r} уже зарегистрирована.')
+        TASKS[name] = func
+        func.task_name = name
+        func.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        func.enqueue = lambda **payload: enqueue(name, **payload)
+        return func
+    return decorator
+
+
+def enqueue(name, run_after=None, **payload):
+    """
+    Постановка задачи в очередь.
+
+    Запись попадает в ту же транзакцию, что и вызывающий код, поэтому
+    при её откате задача тоже исчезает.
+    """
+    func = TASKS[name]
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=func.max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def claim(worker, limit=1):
+    """
+    Захват готовых к выполнению задач.
+
+    На PostgreSQL строки блокируются через SELECT ... FOR UPDATE
+    SKIP LOCKED, и параллельные обработчики пропускают чужие задачи
+    без ожидания. На SQLite каждая задача захватывается условным
+    UPDATE: её получает только тот, у кого он изменил строку.
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(
+        status=Job.QUEUED, run_after__lte=now
+    ).order_by('run_after', 'pk')
+    claimed = {
+        'status': Job.RUNNING,
+        'locked_by': worker,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                ready.select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        ids = [
+            pk for pk in ready.values_list('pk', flat=True)[:limit]
+            if Job.objects.filter(pk=pk, status=Job.QUEUED).update(**claimed)
+        ]
+    return list(Job.objects.filter(pk__in=ids).order_by('run_after', 'pk'))
+
+
+def requeue_stale():
+    """
+    Возврат в очередь задач, обработчик которых пропал: пока задача
+    выполняется, обработчик продлевает locked_at (см. heartbeat).
+    Задачи, исчерпавшие попытки, помечаются как упавшие.
+    Возвращает количество возвращённых и упавших задач.
+    """
+    now = timezone.now()
+    deadline = now - dt.timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=deadline)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED,
+        locked_by='',
+        locked_at=None,
+        finished_at=now,
+        last_error='Обработчик пропал во время выполнения задачи.',
+    )
+    requeued = stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+    return requeued, failed
+
+
+@contextmanager
+def heartbeat(job):
+    """
+    Продление захвата задачи, пока она выполняется: каждую треть
+    JOB_LOCK_TIMEOUT обновляется locked_at, поэтому долгую задачу
+    не забирает второй обработчик.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.JOB_LOCK_TIMEOUT / 3):
+                Job.objects.filter(
+                    pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by
+                ).update(locked_at=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором со случайным разбросом."""
+    delay = min(
+        settings.JOB_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_DELAY,
+    )
+    return dt.timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def run(job):
+    """Выполнение захваченной задачи с повтором при ошибке."""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.task!r}.')
+        with heartbeat(job):
+            func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts and func is not None:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + get_retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+        logger.warning(
+            'Задача %s #%s завершилась ошибкой (попытка %s из %s)',
+            job.task, job.pk, job.attempts, job.max_attempts,
+            exc_info=True,
+        )
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    # Результат записывается, только если задачу не забрали
+    # как брошенную.
+    saved = Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by
+    ).update(
+        status=job.status,
+        run_after=job.run_after,
+        last_error=job.last_error,
+        finished_at=job.finished_at,
+        locked_by='',
+        locked_at=None,
+    )
+    if not saved:
+        logger.warning(
+            'Задача %s #%s уже возвращена в очередь другим обработчиком',
+            job.task, job.pk,
+        )
+    job.locked_by = ''
+    job.locked_at = None
+    return job
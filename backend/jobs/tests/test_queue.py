@@ -0,0 +1,96 @@
+import datetime as dt
+import threading
+import time
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, requeue_stale, run, task
+
+calls = []
+
+
+@task('tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('сбой')
+
+
+@task('tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+
+
+class JobQueueTest(TransactionTestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_run(self):
+        job = record.enqueue(value=1)
+        self.assertEqual([claimed.pk for claimed in claim('w')], [job.pk])
+        self.assertEqual(claim('w'), [])
+        run(Job.objects.get(pk=job.pk))
+        job.refresh_from_db()
+        self.assertEqual(calls, [1])
+        self.assertEqual(
+            (job.status, job.attempts, job.locked_by), (Job.DONE, 1, '')
+        )
+
+    def test_retry_then_fail(self):
+        job = fail.enqueue()
+        with self.assertLogs('foodgram.jobs', 'WARNING'):
+            run(claim('w')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('foodgram.jobs', 'WARNING'):
+            run(claim('w')[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError', job.last_error)
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_requeue_stale(self):
+        retried = record.enqueue(value=1)
+        exhausted = record.enqueue(value=2)
+        fresh = record.enqueue(value=3)
+        claim('w', limit=3)
+        Job.objects.filter(pk=exhausted.pk).update(attempts=2)
+        Job.objects.exclude(pk=fresh.pk).update(
+            locked_at=timezone.now() - dt.timedelta(seconds=61)
+        )
+        self.assertEqual(requeue_stale(), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            retried.pk: Job.QUEUED,
+            exhausted.pk: Job.FAILED,
+            fresh.pk: Job.RUNNING,
+        })
+
+    @override_settings(JOB_LOCK_TIMEOUT=0.3)
+    def test_heartbeat_keeps_long_job(self):
+        job = slow.enqueue(seconds=1)
+        thread = threading.Thread(target=run, args=(claim('w')[0],))
+        thread.start()
+        for _ in range(3):
+            time.sleep(0.3)
+            self.assertEqual(requeue_stale(), (0, 0))
+        thread.join()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 1))
+
+    def test_result_of_reclaimed_job_is_not_saved(self):
+        job = record.enqueue(value=1)
+        claimed = claim('w')[0]
+        Job.objects.filter(pk=job.pk).update(locked_by='other')
+        with self.assertLogs('foodgram.jobs', 'WARNING'):
+            run(claimed)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.RUNNING, 'other'))
@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from outbox.models import ChangeEvent, Checkpoint
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model', 'object_id', 'operation', 'created_at')
+    list_filter = ('model', 'operation')
+    search_fields = ('object_id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Checkpoint)
+class CheckpointAdmin(admin.ModelAdmin):
+    list_display = ('consumer', 'position', 'updated_at')
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models.functions import Now
+
+from .models import ChangeEvent, Checkpoint
+
+
+class Consumer:
+    """
+    Последовательное чтение журнала изменений с сохранением позиции.
+
+    id событий выдаются при вставке, а видны после фиксации транзакции,
+    поэтому событие с меньшим id может появиться позже большего.
+    Чтение останавливается перед пропуском в id. Пропуск, который
+    виден дольше OUTBOX_GAP_TIMEOUT секунд, считается откатившейся
+    транзакцией и пропускается. Время, когда пропуск замечен впервые,
+    хранится в позиции потребителя по часам базы (а не по времени
+    записи событий), поэтому отсчёт продолжается между запусками.
+
+        consumer = Consumer('search-index')
+        events = consumer.poll()
+        rebuild(events)
+        consumer.commit(events)
+    """
+
+    def __init__(self, name, batch_size=None):
+        self.name = name
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+
+    @property
+    def position(self):
+        return self.get_state()[0]
+
+    @property
+    def gaps(self):
+        """Первый пропущенный id -> когда пропуск впервые замечен."""
+        return {
+            int(missing): datetime.fromisoformat(seen)
+            for missing, seen in self.get_state()[1].items()
+        }
+
+    def get_state(self):
+        return Checkpoint.objects.filter(consumer=self.name).values_list(
+            'position', 'gaps'
+        ).first() or (0, {})
+
+    def get_database_now(self):
+        """Время по часам базы, общим для всех процессов потребителя."""
+        checkpoint, _ = Checkpoint.objects.get_or_create(consumer=self.name)
+        return Checkpoint.objects.filter(pk=checkpoint.pk).annotate(
+            now=Now()
+        ).values_list('now', flat=True).get()
+
+    def poll(self):
+        """Следующие необработанные события без пропусков в id."""
+        position, gaps = self.get_state()
+        events = list(
+            ChangeEvent.objects.filter(id__gt=position)
+            .order_by('id')[:self.batch_size]
+        )
+        now = None
+        for index, event in enumerate(events):
+            if event.id != position + 1:
+                if now is None:
+                    now = self.get_database_now()
+                missing = str(position + 1)
+                if missing not in gaps:
+                    gaps[missing] = now.isoformat()
+                    Checkpoint.objects.filter(consumer=self.name).update(
+                        gaps=gaps
+                    )
+                seen = datetime.fromisoformat(gaps[missing])
+                if (
+                    (now - seen).total_seconds()
+                    < settings.OUTBOX_GAP_TIMEOUT
+                ):
+                    return events[:index]
+            position = event.id
+        return events
+
+    def commit(self, events):
+        """Сохранение позиции после обработки событий."""
+        if events:
+            self.seek(events[-1].id)
+
+    def seek(self, position):
+        """Перенос позиции; пропуски до неё больше не нужны."""
+        _, gaps = self.get_state()
+        Checkpoint.objects.update_or_create(
+            consumer=self.name,
+            defaults={
+                'position': position,
+                'gaps': {
+                    missing: seen for missing, seen in gaps.items()
+                    if int(missing) > position
+                },
+            },
+        )
+
+    def consume(self, handler):
+        """
+        Обработка всех накопившихся событий пачками: handler(events)
+        и сохранение позиции после каждой пачки. Возвращает количество
+        обработанных событий.
+        """
+        total = 0
+        while True:
+            events = self.poll()
+            if not events:
+                return total
+            handler(events)
+            self.commit(events)
+            total += len(events)
+
+
+def get_changed_ids(events, *models):
+    """id объектов, затронутых событиями указанных моделей."""
+    return {event.object_id for event in events if event.model in models}
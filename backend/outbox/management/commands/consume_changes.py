@@ -0,0 +1,75 @@
+import signal
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from outbox.consumer import Consumer
+from outbox.models import ChangeEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Чтение журнала изменений потребителем с сохранением позиции. '
+        'Обработчик - функция handler(events) по пути --handler; '
+        'без него выводится сводка по событиям.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumer', help='Имя потребителя.')
+        parser.add_argument(
+            '--handler',
+            help='Путь к функции-обработчику, например app.module.func.'
+        )
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--follow', action='store_true',
+            help='Не завершаться, ждать новых событий.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между опросами журнала в режиме --follow, с.'
+        )
+        position = parser.add_mutually_exclusive_group()
+        position.add_argument(
+            '--reset', action='store_true',
+            help='Начать с начала журнала.'
+        )
+        position.add_argument(
+            '--skip-to-end', action='store_true',
+            help='Пропустить накопившиеся события.'
+        )
+
+    def handle(self, *args, **options):
+        consumer = Consumer(options['consumer'], options['batch_size'])
+        if options['reset']:
+            consumer.seek(0)
+        elif options['skip_to_end']:
+            consumer.seek(
+                ChangeEvent.objects.order_by('-id').values_list(
+                    'id', flat=True
+                ).first() or 0
+            )
+        handler = self.summarize
+        if options['handler']:
+            handler = import_string(options['handler'])
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        while True:
+            processed = consumer.consume(handler)
+            if processed:
+                self.stdout.write(
+                    f'{consumer.name}: обработано {processed}, '
+                    f'позиция {consumer.position}'
+                )
+            if not options['follow'] or stop.wait(options['poll_interval']):
+                break
+            close_old_connections()
+
+    def summarize(self, events):
+        counts = Counter((event.model, event.operation) for event in events)
+        for (model, operation), count in sorted(counts.items()):
+            self.stdout.write(f'  {model:<24} {operation:<7} {count}')
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# Таблица связей, модель в событии, столбец объекта и столбец связанного id.
+RELATIONS = (
+    ('recipes_favorite', 'recipes.favorite', 'recipe_id', 'user_id'),
+    ('recipes_shoppingcart', 'recipes.shoppingcart', 'recipe_id', 'user_id'),
+    ('users_subscription', 'users.subscription', 'author_id', 'user_id'),
+    ('recipes_recipe_tags', 'recipes.recipe_tags', 'recipe_id', 'tag_id'),
+)
+OPERATIONS = (('INSERT', 'NEW', 'create'), ('DELETE', 'OLD', 'delete'))
+
+POSTGRESQL_FUNCTION = """
+CREATE OR REPLACE FUNCTION outbox_record_relation() RETURNS trigger AS $$
+DECLARE
+    changed jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed := to_jsonb(OLD);
+    ELSE
+        changed := to_jsonb(NEW);
+    END IF;
+    INSERT INTO outbox_changeevent
+        (model, object_id, operation, data, created_at)
+    VALUES (
+        TG_ARGV[0],
+        (changed ->> TG_ARGV[1])::bigint,
+        CASE TG_OP WHEN 'INSERT' THEN 'create' ELSE 'delete' END,
+        jsonb_build_object(TG_ARGV[2], (changed ->> TG_ARGV[2])::bigint),
+        now()
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_FUNCTION)
+        for table, model, object_column, related_column in RELATIONS:
+            schema_editor.execute(
+                f'CREATE TRIGGER outbox_{table} '
+                f'AFTER INSERT OR DELETE ON {table} FOR EACH ROW '
+                f"EXECUTE PROCEDURE outbox_record_relation("
+                f"'{model}', '{object_column}', '{related_column}')"
+            )
+    elif vendor == 'sqlite':
+        for table, model, object_column, related_column in RELATIONS:
+            for event, row, operation in OPERATIONS:
+                schema_editor.execute(
+                    f'CREATE TRIGGER outbox_{table}_{operation} '
+                    f'AFTER {event} ON {table} FOR EACH ROW BEGIN '
+                    f'INSERT INTO outbox_changeevent '
+                    f'(model, object_id, operation, data, created_at) '
+                    f"VALUES ('{model}', {row}.{object_column}, "
+                    f"'{operation}', json_object("
+                    f"'{related_column}', {row}.{related_column}), "
+                    f"strftime('%Y-%m-%d %H:%M:%f', 'now')); END"
+                )
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for table, *_ in RELATIONS:
+            schema_editor.execute(
+                f'DROP TRIGGER IF EXISTS outbox_{table} ON {table}'
+            )
+        schema_editor.execute(
+            'DROP FUNCTION IF EXISTS outbox_record_relation()'
+        )
+    elif vendor == 'sqlite':
+        for table, *_ in RELATIONS:
+            for _, _, operation in OPERATIONS:
+                schema_editor.execute(
+                    f'DROP TRIGGER IF EXISTS outbox_{table}_{operation}'
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+        ('recipes', '0005_ingredient_name_trigram_index'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
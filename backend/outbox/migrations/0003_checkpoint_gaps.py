@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0002_relation_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkpoint',
+            name='gaps',
+            field=models.JSONField(blank=True, default=dict, help_text='Пропущенный id -> когда пропуск замечен (время базы).', verbose_name='Пропуски в id'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# Таблица связей, модель в событии, столбец объекта и столбец связанного id.
+RELATIONS = (
+    ('recipes_favorite', 'recipes.favorite', 'recipe_id', 'user_id'),
+    ('recipes_shoppingcart', 'recipes.shoppingcart', 'recipe_id', 'user_id'),
+    ('users_subscription', 'users.subscription', 'author_id', 'user_id'),
+    ('recipes_recipe_tags', 'recipes.recipe_tags', 'recipe_id', 'tag_id'),
+)
+OPERATIONS = (('INSERT', 'NEW', 'create'), ('DELETE', 'OLD', 'delete'))
+
+# Запись пропускается, если в сеансе включена настройка outbox.paused
+# (outbox.recorder.recording_paused).
+PAUSED_CHECK = """
+    IF current_setting('outbox.paused', true) = 'on' THEN
+        RETURN NULL;
+    END IF;"""
+
+POSTGRESQL_FUNCTION = """
+CREATE OR REPLACE FUNCTION outbox_record_relation() RETURNS trigger AS $$
+DECLARE
+    changed jsonb;
+BEGIN{paused_check}
+    IF TG_OP = 'DELETE' THEN
+        changed := to_jsonb(OLD);
+    ELSE
+        changed := to_jsonb(NEW);
+    END IF;
+    INSERT INTO outbox_changeevent
+        (model, object_id, operation, data, created_at)
+    VALUES (
+        TG_ARGV[0],
+        (changed ->> TG_ARGV[1])::bigint,
+        CASE TG_OP WHEN 'INSERT' THEN 'create' ELSE 'delete' END,
+        jsonb_build_object(TG_ARGV[2], (changed ->> TG_ARGV[2])::bigint),
+        now()
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def replace_triggers(schema_editor, pausable):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_FUNCTION.format(
+            paused_check=PAUSED_CHECK if pausable else ''
+        ))
+    elif vendor == 'sqlite':
+        # Функцию outbox_paused() регистрирует outbox.signals для каждого
+        # соединения.
+        condition = 'WHEN NOT outbox_paused() ' if pausable else ''
+        for table, model, object_column, related_column in RELATIONS:
+            for event, row, operation in OPERATIONS:
+                name = f'outbox_{table}_{operation}'
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                schema_editor.execute(
+                    f'CREATE TRIGGER {name} '
+                    f'AFTER {event} ON {table} FOR EACH ROW {condition}'
+                    f'BEGIN INSERT INTO outbox_changeevent '
+                    f'(model, object_id, operation, data, created_at) '
+                    f"VALUES ('{model}', {row}.{object_column}, "
+                    f"'{operation}', json_object("
+                    f"'{related_column}', {row}.{related_column}), "
+                    f"strftime('%Y-%m-%d %H:%M:%f', 'now')); END"
+                )
+
+
+def make_pausable(apps, schema_editor):
+    replace_triggers(schema_editor, pausable=True)
+
+
+def make_unconditional(apps, schema_editor):
+    replace_triggers(schema_editor, pausable=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0003_checkpoint_gaps'),
+    ]
+
+    operations = [
+        migrations.RunPython(make_pausable, make_unconditional),
+    ]
@@ -0,0 +1,84 @@
+from django.db import models
+from django.utils import timezone
+
+from foodgram.constants import (MAX_CHANGE_MODEL_LENGTH,
+                                MAX_CONSUMER_NAME_LENGTH)
+
+
+class ChangeEvent(models.Model):
+    """
+    Событие изменения данных. Записи только добавляются, id служит
+    курсором для потребителей.
+    """
+
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    OPERATIONS = (
+        (CREATE, 'Создание'),
+        (UPDATE, 'Изменение'),
+        (DELETE, 'Удаление'),
+    )
+
+    model = models.CharField(
+        max_length=MAX_CHANGE_MODEL_LENGTH,
+        verbose_name='Модель'
+    )
+    object_id = models.BigIntegerField(
+        verbose_name='Объект',
+        help_text='Рецепт, а для подписок - автор.'
+    )
+    operation = models.CharField(
+        max_length=max(len(operation) for operation, _ in OPERATIONS),
+        choices=OPERATIONS,
+        verbose_name='Операция'
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Связанные id'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время'
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+
+    def __str__(self):
+        return f'#{self.pk} {self.operation} {self.model} {self.object_id}'
+
+
+class Checkpoint(models.Model):
+    """Позиция потребителя в журнале изменений."""
+
+    consumer = models.CharField(
+        max_length=MAX_CONSUMER_NAME_LENGTH,
+        unique=True,
+        verbose_name='Потребитель'
+    )
+    position = models.BigIntegerField(
+        default=0,
+        verbose_name='Последнее обработанное событие'
+    )
+    gaps = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Пропуски в id',
+        help_text='Пропущенный id -> когда пропуск замечен (время базы).'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлена'
+    )
+
+    class Meta:
+        ordering = ('consumer',)
+        verbose_name = 'Позиция потребителя'
+        verbose_name_plural = 'Позиции потребителей'
+
+    def __str__(self):
+        return f'{self.consumer}: {self.position}'
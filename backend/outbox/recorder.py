@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DatabaseError, connections
+
+from recipes.models import IngredientRecipe, Recipe
+from .models import ChangeEvent
+
+# События связей (избранное, списки покупок, подписки, теги рецептов)
+# записывают триггеры базы (миграции 0002_relation_triggers
+# и 0004_pausable_triggers) тем же запросом, что и изменение, - в том
+# числе при удалении каскадом и через clear(). Модель в событии тегов
+# рецептов:
+RECIPE_TAGS = 'recipes.recipe_tags'
+
+# Модели, события которых записываются сигналами и явно в пакетных
+# вставках: объект, которого касается изменение, и остальные id.
+TRACKED_MODELS = {
+    Recipe: lambda recipe: (recipe.pk, {'author_id': recipe.author_id}),
+    IngredientRecipe: lambda item: (
+        item.recipe_id, {'ingredient_id': item.ingredient_id}
+    ),
+}
+
+# Флаг настройки сеанса PostgreSQL, который проверяют триггеры.
+PAUSED_SETTING = 'outbox.paused'
+
+_signals_paused = ContextVar('outbox_signals_paused', default=False)
+_paused = ContextVar('outbox_paused', default=False)
+
+
+@contextmanager
+def explicit_recording():
+    """
+    Отключение записи событий по сигналам внутри блока: код с пакетными
+    вставками записывает события сам, без повторов от save().
+    """
+    token = _signals_paused.set(True)
+    try:
+        yield
+    finally:
+        _signals_paused.reset(token)
+
+
+def signals_paused():
+    return _signals_paused.get()
+
+
+def is_paused():
+    """Запись приостановлена (recording_paused); outbox_paused() в SQLite."""
+    return _paused.get()
+
+
+def set_triggers_paused(connection, paused):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT set_config(%s, %s, false)',
+                [PAUSED_SETTING, 'on' if paused else 'off'],
+            )
+
+
+@contextmanager
+def recording_paused(using='default'):
+    """
+    Без записи событий внутри блока - ни сигналами, ни явно
+    (record_many), ни триггерами базы using. Для генераторов
+    синтетических данных: событие на каждую из миллионов вставленных
+    строк удваивает запись, а производные данные после генерации
+    всё равно перестраиваются целиком.
+
+    На PostgreSQL флаг - настройка сеанса, поэтому блок нужно начинать
+    вне транзакции, которая может откатиться.
+    """
+    connection = connections[using]
+    signals_token = _signals_paused.set(True)
+    paused_token = _paused.set(True)
+    set_triggers_paused(connection, True)
+    try:
+        yield
+    finally:
+        _paused.reset(paused_token)
+        _signals_paused.reset(signals_token)
+        try:
+            set_triggers_paused(connection, False)
+        except DatabaseError:
+            # Сеанс в состоянии ошибки: флаг уйдёт вместе с ним.
+            connection.close()
+
+
+def make_event(instance, operation):
+    """Событие изменения экземпляра отслеживаемой модели."""
+    object_id, data = TRACKED_MODELS[type(instance)](instance)
+    return ChangeEvent(
+        model=instance._meta.label_lower,
+        object_id=object_id,
+        operation=operation,
+        data=data,
+    )
+
+
+def make_events(objects, operation):
+    """События для экземпляров отслеживаемых моделей среди objects."""
+    return [
+        make_event(obj, operation)
+        for obj in objects if type(obj) in TRACKED_MODELS
+    ]
+
+
+def record(instance, operation):
+    """
+    Запись события. Должна выполняться в той же транзакции,
+    что и изменение, иначе событие может потеряться или остаться
+    от отменённого изменения.
+    """
+    make_event(instance, operation).save()
+
+
+def record_many(events):
+    """Запись событий пакетных изменений одним запросом."""
+    if events and not is_paused():
+        ChangeEvent.objects.bulk_create(events)
@@ -0,0 +1,32 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+
+from .models import ChangeEvent
+from .recorder import TRACKED_MODELS, is_paused, record, signals_paused
+
+
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or signals_paused():
+        return
+    record(instance, ChangeEvent.CREATE if created else ChangeEvent.UPDATE)
+
+
+def record_deleted(sender, instance, **kwargs):
+    if not signals_paused():
+        record(instance, ChangeEvent.DELETE)
+
+
+for model in TRACKED_MODELS:
+    post_save.connect(record_saved, sender=model)
+    post_delete.connect(record_deleted, sender=model)
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """Функция, по которой триггеры SQLite пропускают запись событий."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'outbox_paused', 0, is_paused
+        )
+
+
+connection_created.connect(register_sqlite_functions)
@@ -0,0 +1,146 @@
+import datetime as dt
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from outbox.consumer import Consumer, get_changed_ids
+from outbox.models import ChangeEvent, Checkpoint
+
+START = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+MINUTE = dt.timedelta(minutes=1)
+
+
+def create_events(*ids):
+    return ChangeEvent.objects.bulk_create(
+        ChangeEvent(
+            id=pk, model='recipes.recipe', object_id=pk,
+            operation=ChangeEvent.UPDATE,
+        )
+        for pk in ids
+    )
+
+
+@override_settings(OUTBOX_GAP_TIMEOUT=60)
+class ConsumerTest(TestCase):
+
+    def poll_ids(self, consumer):
+        return [event.id for event in consumer.poll()]
+
+    def test_poll_and_commit(self):
+        create_events(1, 2, 3)
+        consumer = Consumer('test', batch_size=2)
+        events = consumer.poll()
+        self.assertEqual([event.id for event in events], [1, 2])
+        self.assertEqual(self.poll_ids(consumer), [1, 2])
+        consumer.commit(events)
+        self.assertEqual(consumer.position, 2)
+        self.assertEqual(self.poll_ids(Consumer('test')), [3])
+        self.assertEqual(self.poll_ids(Consumer('other')), [1, 2, 3])
+
+    def at(self, seconds):
+        """Часы базы через seconds секунд после START."""
+        return mock.patch.object(
+            Consumer, 'get_database_now',
+            return_value=START + dt.timedelta(seconds=seconds),
+        )
+
+    def test_gap_waits_for_late_commit(self):
+        create_events(1, 3)
+        consumer = Consumer('test')
+        with self.at(0):
+            self.assertEqual(self.poll_ids(consumer), [1])
+            consumer.commit(consumer.poll())
+            self.assertEqual(self.poll_ids(consumer), [])
+        create_events(2)
+        with self.at(10):
+            self.assertEqual(self.poll_ids(consumer), [2, 3])
+
+    def test_gap_skipped_after_timeout(self):
+        create_events(1, 3)
+        consumer = Consumer('test')
+        consumer.seek(1)
+        with self.at(0):
+            self.assertEqual(self.poll_ids(consumer), [])
+        self.assertEqual(consumer.gaps, {2: START})
+        with self.at(59):
+            self.assertEqual(self.poll_ids(consumer), [])
+        with self.at(60):
+            events = consumer.poll()
+        self.assertEqual([event.id for event in events], [3])
+        consumer.commit(events)
+        self.assertEqual(consumer.gaps, {})
+
+    def test_gap_time_survives_restart(self):
+        create_events(1, 3, 5)
+        Consumer('test').seek(1)
+        with self.at(0):
+            self.assertEqual(self.poll_ids(Consumer('test')), [])
+        with self.at(60):
+            consumer = Consumer('test')
+            events = consumer.poll()
+            self.assertEqual([event.id for event in events], [3])
+            consumer.commit(events)
+        # Следующий пропуск замечен только сейчас и ждёт свой срок.
+        self.assertEqual(Consumer('test').gaps, {4: START + MINUTE})
+        with self.at(119):
+            self.assertEqual(self.poll_ids(Consumer('test')), [])
+        with self.at(120):
+            self.assertEqual(self.poll_ids(Consumer('test')), [5])
+
+    def test_gap_timeout_ignores_event_time(self):
+        """Старое время записи события не сокращает ожидание."""
+        create_events(1, 3)
+        ChangeEvent.objects.filter(pk=3).update(
+            created_at='2000-01-01T00:00:00Z'
+        )
+        consumer = Consumer('test')
+        consumer.seek(1)
+        self.assertEqual(self.poll_ids(consumer), [])
+
+    def test_consume(self):
+        create_events(1, 2, 3)
+        batches = []
+        consumer = Consumer('test', batch_size=2)
+        self.assertEqual(consumer.consume(batches.append), 3)
+        self.assertEqual(
+            [[event.id for event in batch] for batch in batches],
+            [[1, 2], [3]],
+        )
+        self.assertEqual(
+            Checkpoint.objects.get(consumer='test').position, 3
+        )
+        self.assertEqual(
+            get_changed_ids(batches[0], 'recipes.recipe'), {1, 2}
+        )
+
+    def test_command(self):
+        create_events(1, 2)
+        stdout = StringIO()
+        call_command('consume_changes', 'test', stdout=stdout)
+        self.assertIn('обработано 2', stdout.getvalue())
+        self.assertEqual(Consumer('test').position, 2)
+        stdout = StringIO()
+        call_command('consume_changes', 'test', '--reset', stdout=stdout)
+        self.assertIn('обработано 2', stdout.getvalue())
+
+    def test_command_skips_gap_on_later_run(self):
+        create_events(1, 3)
+        stdout = StringIO()
+        call_command('consume_changes', 'test', stdout=stdout)
+        self.assertIn('обработано 1, позиция 1', stdout.getvalue())
+        self.assertEqual(list(Consumer('test').gaps), [2])
+        # Следующий запуск по расписанию - через тысячу секунд.
+        checkpoint = Checkpoint.objects.get(consumer='test')
+        checkpoint.gaps = {
+            missing: (
+                dt.datetime.fromisoformat(seen) - dt.timedelta(seconds=1000)
+            ).isoformat()
+            for missing, seen in checkpoint.gaps.items()
+        }
+        checkpoint.save()
+        stdout = StringIO()
+        call_command('consume_changes', 'test', stdout=stdout)
+        self.assertIn('обработано 1, позиция 3', stdout.getvalue())
+        self.assertEqual(Consumer('test').gaps, {})
@@ -0,0 +1,140 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from outbox.models import ChangeEvent
+from outbox.recorder import RECIPE_TAGS, recording_paused
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.deletion import delete_in_batches
+from users.models import Subscription, User
+
+
+class RecordingTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass-123'
+        )
+        self.lunch, self.dinner = (
+            Tag.objects.create(name=name, slug=slug, color='#FFFFFF')
+            for name, slug in (('Обед', 'lunch'), ('Ужин', 'dinner'))
+        )
+        self.salt = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Суп', text='Описание',
+            cooking_time=10, image='recipes/images/soup.png',
+        )
+        self.recipe.tags.add(self.lunch)
+        IngredientRecipe.objects.create(
+            recipe=self.recipe, ingredient=self.salt, amount=5
+        )
+        ChangeEvent.objects.all().delete()
+
+    def get_client(self, user):
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def get_events(self):
+        return sorted(
+            (event.model, event.operation, event.object_id, event.data)
+            for event in ChangeEvent.objects.all()
+        )
+
+    def test_patch_records_single_update(self):
+        response = self.get_client(self.author).patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            {
+                'name': 'Борщ',
+                'tags': [self.dinner.pk],
+                'ingredients': [{'id': self.salt.pk, 'amount': 7}],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        recipe_id = self.recipe.pk
+        self.assertEqual(self.get_events(), sorted([
+            ('recipes.ingredientrecipe', 'create', recipe_id,
+             {'ingredient_id': self.salt.pk}),
+            ('recipes.ingredientrecipe', 'delete', recipe_id,
+             {'ingredient_id': self.salt.pk}),
+            ('recipes.recipe', 'update', recipe_id,
+             {'author_id': self.author.pk}),
+            (RECIPE_TAGS, 'create', recipe_id, {'tag_id': self.dinner.pk}),
+            (RECIPE_TAGS, 'delete', recipe_id, {'tag_id': self.lunch.pk}),
+        ]))
+
+    def test_tags_clear(self):
+        self.recipe.tags.clear()
+        self.assertEqual(self.get_events(), [
+            (RECIPE_TAGS, 'delete', self.recipe.pk,
+             {'tag_id': self.lunch.pk}),
+        ])
+
+    def test_toggles(self):
+        client = self.get_client(self.reader)
+        client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        client.post(f'/api/recipes/{self.recipe.pk}/shopping_cart/')
+        client.post(f'/api/users/{self.author.pk}/subscribe/')
+        client.delete(f'/api/users/{self.author.pk}/subscribe/')
+        user = {'user_id': self.reader.pk}
+        self.assertEqual(self.get_events(), sorted([
+            ('recipes.favorite', 'create', self.recipe.pk, user),
+            ('recipes.shoppingcart', 'create', self.recipe.pk, user),
+            ('users.subscription', 'create', self.author.pk, user),
+            ('users.subscription', 'delete', self.author.pk, user),
+        ]))
+
+    def test_cascade_delete(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.recipe)
+        Subscription.objects.create(user=self.reader, author=self.author)
+        ChangeEvent.objects.all().delete()
+        recipe_id, author_id = self.recipe.pk, self.author.pk
+        self.author.delete()
+        user = {'user_id': self.reader.pk}
+        self.assertEqual(self.get_events(), sorted([
+            ('recipes.favorite', 'delete', recipe_id, user),
+            ('recipes.ingredientrecipe', 'delete', recipe_id,
+             {'ingredient_id': self.salt.pk}),
+            ('recipes.recipe', 'delete', recipe_id, {'author_id': author_id}),
+            ('recipes.shoppingcart', 'delete', recipe_id, user),
+            (RECIPE_TAGS, 'delete', recipe_id, {'tag_id': self.lunch.pk}),
+            ('users.subscription', 'delete', author_id, user),
+        ]))
+
+    def test_rolled_back_change_has_no_event(self):
+        client = self.get_client(self.reader)
+        client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(
+            ChangeEvent.objects.filter(model='recipes.favorite').count(), 1
+        )
+
+    def test_recording_paused(self):
+        with recording_paused():
+            Favorite.objects.create(user=self.reader, recipe=self.recipe)
+            self.recipe.tags.add(self.dinner)
+            Recipe.objects.create(
+                author=self.reader, name='Каша', text='Описание',
+                cooking_time=5, image='recipes/images/porridge.png',
+            )
+            delete_in_batches(
+                IngredientRecipe.objects.filter(recipe=self.recipe), 10
+            )
+        self.assertEqual(self.get_events(), [])
+        self.recipe.tags.remove(self.dinner)
+        self.assertEqual(self.get_events(), [
+            (RECIPE_TAGS, 'delete', self.recipe.pk,
+             {'tag_id': self.dinner.pk}),
+        ])
@@ -0,0 +1,124 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from django.db.models.functions import Collate
+
+from recipes.models import Recipe
+
+# Порядок строк по кодам символов, как при сравнении строк в Python.
+BINARY_COLLATIONS = {'postgresql': 'C', 'sqlite': 'BINARY'}
+
+
+def scan_files(root, prefix):
+    """
+    Обход каталога в порядке строк относительных путей:
+    (путь, размер, время изменения).
+
+    Каталог сортируется по имени со слешем на конце: так все пути
+    внутри него встают на то же место, что и при сортировке строк.
+    """
+    with os.scandir(root) as entries:
+        items = sorted(
+            (
+                (entry.name + '/', entry)
+                if entry.is_dir(follow_symlinks=False)
+                else (entry.name, entry)
+                for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+                or entry.is_file(follow_symlinks=False)
+            ),
+            key=lambda item: item[0],
+        )
+    for name, entry in items:
+        if name.endswith('/'):
+            yield from scan_files(entry.path, prefix + name)
+        else:
+            stat = entry.stat(follow_symlinks=False)
+            yield prefix + name, stat.st_size, stat.st_mtime
+
+
+def referenced_images(prefix, chunk_size):
+    """
+    Пути изображений рецептов в том же порядке, что и у scan_files,
+    одним потоковым запросом.
+    """
+    using = router.db_for_read(Recipe)
+    collation = BINARY_COLLATIONS[connections[using].vendor]
+    previous = ''
+    for name in (
+        Recipe.objects.using(using)
+        .filter(image__startswith=prefix)
+        .order_by(Collate('image', collation))
+        .values_list('image', flat=True)
+        .iterator(chunk_size=chunk_size)
+    ):
+        if name < previous:
+            raise CommandError(
+                'База вернула пути изображений не по порядку: '
+                'удаление остановлено.'
+            )
+        previous = name
+        yield name
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление файлов изображений, на которые не ссылается ни один '
+        'рецепт и которые старше заданного срока.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=Recipe.image.field.upload_to,
+            help='Каталог внутри MEDIA_ROOT.'
+        )
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help='Не трогать файлы моложе этого срока.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько путей из базы читать за одно обращение.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def handle(self, *args, **options):
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        root = os.path.join(media_root, options['directory'])
+        if not os.path.isdir(root):
+            raise CommandError(f'Каталог {root} не найден.')
+        prefix = os.path.relpath(root, media_root).replace(os.sep, '/') + '/'
+        deadline = time.time() - options['grace_hours'] * 3600
+        referenced = referenced_images(prefix, options['chunk_size'])
+        reference = next(referenced, None)
+        scanned = deleted = freed = 0
+        # Слияние двух отсортированных потоков: файлов на диске и путей
+        # из базы, без запросов на каждую пачку файлов.
+        for name, size, mtime in scan_files(root, prefix):
+            while reference is not None and reference < name:
+                reference = next(referenced, None)
+            if mtime >= deadline:
+                continue
+            scanned += 1
+            if name == reference:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'Будет удалён {name}')
+            else:
+                try:
+                    os.remove(os.path.join(media_root, name))
+                except FileNotFoundError:
+                    continue
+            deleted += 1
+            freed += size
+        action = 'Найдено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов старше срока: {scanned}. {action} '
+            f'неиспользуемых: {deleted} ({freed / 1024 ** 2:.1f} МБ).'
+        ))
@@ -0,0 +1,98 @@
+import itertools
+import json
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import IngredientRecipe, Recipe
+
+
+RECIPE_FIELDS = (
+    'id', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+    'author__email', 'author__username',
+    'author__first_name', 'author__last_name',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка рецептов с ингредиентами, тегами и ссылками '
+        'на изображения в формате NDJSON (один рецепт на строку).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки (по умолчанию stdout).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            self.export(sys.stdout, options['chunk_size'])
+            return
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            self.export(file, options['chunk_size'])
+
+    def export(self, file, chunk_size):
+        started = time.monotonic()
+        exported = 0
+        recipes = (
+            Recipe.objects.order_by('pk')
+            .values(*RECIPE_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+        while True:
+            chunk = list(itertools.islice(recipes, chunk_size))
+            if not chunk:
+                break
+            ids = [recipe['id'] for recipe in chunk]
+            tags = defaultdict(list)
+            for recipe_id, name, color, slug in (
+                Recipe.tags.through.objects.filter(recipe_id__in=ids)
+                .values_list(
+                    'recipe_id', 'tag__name', 'tag__color', 'tag__slug'
+                )
+            ):
+                tags[recipe_id].append(
+                    {'name': name, 'color': color, 'slug': slug}
+                )
+            ingredients = defaultdict(list)
+            for recipe_id, name, measurement_unit, amount in (
+                IngredientRecipe.objects.filter(recipe_id__in=ids)
+                .values_list(
+                    'recipe_id', 'ingredient__name',
+                    'ingredient__measurement_unit', 'amount'
+                )
+            ):
+                ingredients[recipe_id].append({
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                    'amount': amount,
+                })
+            for recipe in chunk:
+                file.write(json.dumps({
+                    'id': recipe['id'],
+                    'author': {
+                        'email': recipe['author__email'],
+                        'username': recipe['author__username'],
+                        'first_name': recipe['author__first_name'],
+                        'last_name': recipe['author__last_name'],
+                    },
+                    'name': recipe['name'],
+                    'text': recipe['text'],
+                    'cooking_time': recipe['cooking_time'],
+                    'image': recipe['image'],
+                    'pub_date': recipe['pub_date'].isoformat(),
+                    'tags': tags[recipe['id']],
+                    'ingredients': ingredients[recipe['id']],
+                }, ensure_ascii=False))
+                file.write('\n')
+            exported += len(chunk)
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stderr.write(
+                f'Выгружено рецептов: {exported} '
+                f'({exported / elapsed:.0f} в секунду)'
+            )
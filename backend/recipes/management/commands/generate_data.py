@@ -0,0 +1,347 @@
+import csv
+import io
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from rest_framework.authtoken.models import Token
+
+from api.services.conditional import bump_version
+from api.services.facets import reset_facets
+from outbox.recorder import recording_paused
+from recipes.models import (TAG_IDS_CACHE_KEY, Favorite, Ingredient,
+                            IngredientRecipe, Recipe, ShoppingCart, Tag)
+from users.deletion import delete_in_batches
+from users.models import Subscription, User
+
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C94C', 'dessert'),
+    ('Выпечка', '#EB5757', 'bakery'),
+    ('Салаты', '#2F80ED', 'salads'),
+)
+PASSWORD = 'foodgram-synthetic'
+ZIPF_EXPONENT = 1.1
+PARETO_ALPHA = 1.5
+INGREDIENTS_PER_RECIPE = (3, 15)
+TAGS_PER_RECIPE = (1, 3)
+
+
+def zipf_cum_weights(size, rng):
+    """Накопленные веса популярности по закону Ципфа в случайном порядке."""
+    weights = [1 / (rank ** ZIPF_EXPONENT) for rank in range(1, size + 1)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def pareto_count(rng, mean, limit):
+    """Количество связей с «тяжёлым хвостом» и заданным средним."""
+    scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    return min(limit, int(rng.paretovariate(PARETO_ALPHA) * scale))
+
+
+def weighted_sample(rng, population, cum_weights, count):
+    """Выборка без повторов с учётом популярности."""
+    chosen = dict.fromkeys(
+        rng.choices(population, cum_weights=cum_weights, k=count)
+    )
+    return list(chosen)[:count]
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических пользователей, рецептов, избранного, '
+        'списков покупок и подписок для нагрузочной проверки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=float, default=30,
+            help='Среднее количество рецептов в избранном у пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=float, default=5,
+            help='Среднее количество рецептов в списке покупок.'
+        )
+        parser.add_argument(
+            '--subscriptions', type=float, default=10,
+            help='Среднее количество подписок у пользователя.'
+        )
+        parser.add_argument(
+            '--authors-share', type=float, default=0.2,
+            help='Доля пользователей, публикующих рецепты.'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=20000)
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить данные, созданные ранее с тем же --seed.'
+        )
+
+    def handle(self, *args, **options):
+        # Без событий журнала изменений: триггер на каждую вставленную
+        # связь удвоил бы запись, а производные данные после генерации
+        # перестраиваются целиком.
+        with recording_paused():
+            self.generate(options)
+
+    def generate(self, options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredients:
+            raise CommandError(
+                'Сначала загрузите ингредиенты: manage.py load_ingredients.'
+            )
+        tags = self.get_tags()
+        started = time.monotonic()
+        existing = self.get_synthetic_users(options['seed'])
+        if options['reset']:
+            self.reset(existing)
+        elif existing.exists():
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже созданы. Укажите '
+                f'другой --seed или --reset, чтобы пересоздать их.'
+            )
+
+        users = self.create_users(options['users'], options['seed'])
+        authors = self.rng.sample(
+            users, max(1, int(len(users) * options['authors_share']))
+        )
+        recipes = self.create_recipes(options['recipes'], authors)
+        self.insert(
+            Recipe.tags.through,
+            (
+                Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in self.rng.sample(
+                    tags, self.rng.randint(*TAGS_PER_RECIPE)
+                )
+            ),
+            'Теги рецептов',
+        )
+        for start in range(0, len(recipes), self.batch_size):
+            Recipe.rebuild_tags_masks(recipes[start:start + self.batch_size])
+        ingredient_weights = zipf_cum_weights(len(ingredients), self.rng)
+        self.insert(
+            IngredientRecipe,
+            (
+                IngredientRecipe(
+                    recipe_id=recipe,
+                    ingredient_id=ingredient,
+                    amount=self.rng.randint(1, 1000),
+                )
+                for recipe in recipes
+                for ingredient in weighted_sample(
+                    self.rng, ingredients, ingredient_weights,
+                    self.rng.randint(*INGREDIENTS_PER_RECIPE),
+                )
+            ),
+            'Ингредиенты рецептов',
+        )
+        recipe_weights = zipf_cum_weights(len(recipes), self.rng)
+        for model, mean, label in (
+            (Favorite, options['favorites'], 'Избранное'),
+            (ShoppingCart, options['carts'], 'Списки покупок'),
+        ):
+            self.insert(
+                model,
+                (
+                    model(user_id=user, recipe_id=recipe)
+                    for user in users
+                    for recipe in weighted_sample(
+                        self.rng, recipes, recipe_weights,
+                        pareto_count(self.rng, mean, len(recipes)),
+                    )
+                ),
+                label,
+            )
+        author_weights = zipf_cum_weights(len(authors), self.rng)
+        self.insert(
+            Subscription,
+            (
+                Subscription(user_id=user, author_id=author)
+                for user in users
+                for author in weighted_sample(
+                    self.rng, authors, author_weights,
+                    pareto_count(
+                        self.rng, options['subscriptions'], len(authors)
+                    ),
+                )
+                if author != user
+            ),
+            'Подписки',
+        )
+        reset_facets()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с.'
+        ))
+
+    def get_tags(self):
+        """
+        Теги создаются через save(): он проверяет, что id помещается
+        в маску рецепта, а сигналы сбрасывают кеш слагов и версию тегов.
+        """
+        if not Tag.objects.exists():
+            try:
+                with transaction.atomic():
+                    for name, color, slug in DEFAULT_TAGS:
+                        Tag(name=name, color=color, slug=slug).save()
+            except ValidationError as error:
+                raise CommandError(error.messages[0])
+        return list(Tag.objects.values_list('id', flat=True))
+
+    @staticmethod
+    def reset_tag_caches():
+        cache.delete(TAG_IDS_CACHE_KEY)
+        bump_version('tags')
+
+    @staticmethod
+    def get_synthetic_users(seed):
+        return User.objects.filter(username__startswith=f'synthetic{seed}_')
+
+    def reset(self, users):
+        """Удаление пользователей предыдущего запуска и их данных."""
+        for label, queryset in (
+            ('Избранное', Favorite.objects.filter(
+                Q(user__in=users) | Q(recipe__author__in=users)
+            )),
+            ('Списки покупок', ShoppingCart.objects.filter(
+                Q(user__in=users) | Q(recipe__author__in=users)
+            )),
+            ('Подписки', Subscription.objects.filter(
+                Q(user__in=users) | Q(author__in=users)
+            )),
+            ('Ингредиенты рецептов', IngredientRecipe.objects.filter(
+                recipe__author__in=users
+            )),
+            ('Теги рецептов', Recipe.tags.through.objects.filter(
+                recipe__author__in=users
+            )),
+            ('Рецепты', Recipe.objects.filter(author__in=users)),
+            ('Токены', Token.objects.filter(user__in=users)),
+            ('Пользователи', users),
+        ):
+            deleted = delete_in_batches(queryset, self.batch_size)
+            self.stdout.write(f'{label}: удалено {deleted}')
+        # Пакетное удаление не вызывает сигналов моделей.
+        self.reset_tag_caches()
+
+    def create_users(self, count, seed):
+        password = make_password(PASSWORD)
+        last_id = self.get_last_id(User)
+        self.insert(
+            User,
+            (
+                User(
+                    username=f'synthetic{seed}_{number}',
+                    email=f'synthetic{seed}_{number}@example.com',
+                    first_name=f'Имя{number}',
+                    last_name=f'Фамилия{number}',
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            'Пользователи',
+            total=count,
+        )
+        return self.get_new_ids(User, last_id)
+
+    def create_recipes(self, count, authors):
+        last_id = self.get_last_id(Recipe)
+        author_weights = zipf_cum_weights(len(authors), self.rng)
+        self.insert(
+            Recipe,
+            (
+                Recipe(
+                    author_id=author,
+                    name=f'Рецепт {number}',
+                    text='Описание рецепта. ' * self.rng.randint(5, 50),
+                    image='recipes/images/synthetic.png',
+                    cooking_time=self.rng.randint(5, 180),
+                )
+                for number, author in enumerate(self.rng.choices(
+                    authors, cum_weights=author_weights, k=count
+                ))
+            ),
+            'Рецепты',
+            total=count,
+        )
+        return self.get_new_ids(Recipe, last_id)
+
+    @staticmethod
+    def get_last_id(model):
+        return model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+    @staticmethod
+    def get_new_ids(model, last_id):
+        return list(
+            model.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def insert(self, model, objects, label, total=None):
+        """Пакетная вставка: COPY для PostgreSQL, bulk_create для прочих."""
+        started = time.monotonic()
+        done = 0
+        objects = iter(objects)
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            if connection.vendor == 'postgresql':
+                self.copy(model, batch)
+            else:
+                model.objects.bulk_create(batch)
+            done += len(batch)
+            rate = done / max(time.monotonic() - started, 1e-9)
+            progress = f'{done}/{total}' if total else str(done)
+            self.stdout.write(
+                f'\r{label}: {progress} ({rate:.0f} строк/с)', ending=''
+            )
+            self.stdout.flush()
+        self.stdout.write(
+            f'\r{label}: {done} за {time.monotonic() - started:.1f} с'
+        )
+
+    @staticmethod
+    def copy(model, batch):
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in batch:
+            writer.writerow(
+                '\\N' if value is None else value
+                for value in (
+                    field.get_db_prep_save(
+                        field.pre_save(obj, add=True), connection
+                    )
+                    for field in fields
+                )
+            )
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
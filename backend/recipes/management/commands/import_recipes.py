@@ -0,0 +1,224 @@
+import itertools
+import json
+import sys
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from api.services.facets import reset_facets
+from outbox.models import ChangeEvent
+from outbox.recorder import explicit_recording, make_event, record_many
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, Tag,
+                            get_tags_mask)
+from recipes.utils import bulk_create_returning_ids
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузка рецептов из NDJSON-файла, созданного export_recipes, '
+        'пакетами с переназначением id. Рецепты, автора или теги которых '
+        'нельзя сопоставить с базой, пропускаются с ошибкой по строке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--input', default='-',
+            help='Файл с рецептами (по умолчанию stdin).'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--id-map',
+            help='Файл для записи соответствия старых и новых id (CSV).'
+        )
+
+    def handle(self, *args, **options):
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.id_map = None
+        if options['id_map']:
+            self.id_map = open(options['id_map'], 'w', encoding='utf-8')
+        try:
+            if options['input'] == '-':
+                self.load(sys.stdin, options['batch_size'])
+            else:
+                with open(options['input'], encoding='utf-8') as file:
+                    self.load(file, options['batch_size'])
+        finally:
+            if self.id_map is not None:
+                self.id_map.close()
+
+    def load(self, file, batch_size):
+        started = time.monotonic()
+        imported = skipped = 0
+        lines = (
+            (number, line) for number, line in enumerate(file, start=1)
+            if line.strip()
+        )
+        while True:
+            batch = [
+                (number, json.loads(line))
+                for number, line in itertools.islice(lines, batch_size)
+            ]
+            if not batch:
+                break
+            created = self.import_batch(batch)
+            reset_facets()
+            imported += created
+            skipped += len(batch) - created
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stdout.write(
+                f'Загружено рецептов: {imported} '
+                f'({imported / elapsed:.0f} в секунду)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} рецептов за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено рецептов с ошибками: {skipped}.'
+            ))
+
+    @transaction.atomic
+    @explicit_recording()
+    def import_batch(self, lines):
+        """Загрузка пачки строк; возвращает количество рецептов."""
+        items = [item for _, item in lines]
+        authors = self.get_authors(items)
+        self.add_missing_tags(items)
+        self.add_missing_ingredients(items)
+        batch = []
+        for number, item in lines:
+            error = self.get_error(item, authors)
+            if error is None:
+                batch.append(item)
+            else:
+                self.stderr.write(f'Строка {number}: {error}')
+        if not batch:
+            return 0
+        recipes = bulk_create_returning_ids(Recipe, [
+            Recipe(
+                author_id=authors[item['author']['email']],
+                name=item['name'],
+                text=item['text'],
+                cooking_time=item['cooking_time'],
+                image=item['image'],
+                tags_mask=get_tags_mask(
+                    self.tags[tag['slug']] for tag in item['tags']
+                ),
+            )
+            for item in batch
+        ])
+        for recipe, item in zip(recipes, batch):
+            recipe.pub_date = parse_datetime(item['pub_date'])
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(
+                recipe_id=recipe.pk, tag_id=self.tags[tag['slug']]
+            )
+            for recipe, item in zip(recipes, batch)
+            for tag in item['tags']
+        )
+        ingredients = IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe_id=recipe.pk,
+                ingredient_id=self.ingredients[
+                    ingredient['name'], ingredient['measurement_unit']
+                ],
+                amount=ingredient['amount'],
+            )
+            for recipe, item in zip(recipes, batch)
+            for ingredient in item['ingredients']
+        )
+        record_many(
+            [make_event(recipe, ChangeEvent.CREATE) for recipe in recipes]
+            + [make_event(item, ChangeEvent.CREATE) for item in ingredients]
+        )
+        if self.id_map is not None:
+            self.id_map.writelines(
+                f'{item["id"]},{recipe.pk}\n'
+                for recipe, item in zip(recipes, batch)
+            )
+        return len(recipes)
+
+    def get_error(self, item, authors):
+        """
+        Причина, по которой рецепт нельзя загрузить: автор или тег
+        не создан, потому что email, username, имя или слаг уже заняты
+        другой записью.
+        """
+        author = item['author']
+        if author['email'] not in authors:
+            return (
+                f'автор {author["email"]} не создан: username '
+                f'{author["username"]!r} занят другим пользователем.'
+            )
+        for tag in item['tags']:
+            if tag['slug'] not in self.tags:
+                return (
+                    f'тег {tag["slug"]!r} не создан: название '
+                    f'{tag["name"]!r} занято другим тегом или превышено '
+                    f'количество тегов.'
+                )
+        return None
+
+    @staticmethod
+    def get_authors(batch):
+        """Авторы по email; недостающие создаются без пароля."""
+        data = {item['author']['email']: item['author'] for item in batch}
+        User.objects.bulk_create(
+            (
+                User(**author, password=make_password(None))
+                for author in data.values()
+            ),
+            ignore_conflicts=True,
+        )
+        return dict(
+            User.objects.filter(email__in=data).values_list('email', 'id')
+        )
+
+    def add_missing_tags(self, batch):
+        """
+        Новые теги создаются по одному через save(), который
+        проверяет, что id тега помещается в маску рецепта.
+        """
+        missing = {
+            tag['slug']: tag
+            for item in batch for tag in item['tags']
+            if tag['slug'] not in self.tags
+        }
+        for slug, data in missing.items():
+            tag = Tag(**data)
+            try:
+                with transaction.atomic():
+                    tag.save()
+            except (IntegrityError, ValidationError):
+                continue
+            self.tags[slug] = tag.pk
+
+    def add_missing_ingredients(self, batch):
+        missing = {
+            (ingredient['name'], ingredient['measurement_unit'])
+            for item in batch for ingredient in item['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing
+            ),
+            ignore_conflicts=True,
+        )
+        for pk, name, unit in Ingredient.objects.filter(
+            name__in={name for name, _ in missing}
+        ).values_list('id', 'name', 'measurement_unit'):
+            self.ingredients[name, unit] = pk
@@ -1,19 +1,27 @@
-import csv
+import os
 
 from django.core.management.base import BaseCommand
 
-from recipes.models import Ingredient
+from recipes.tasks import load_ingredients
 
 
 class Command(BaseCommand):
     help = 'Загрузка ингредиентов в базу данных из csv файла.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Путь к csv файлу (по умолчанию data/ingredients.csv).'
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Поставить загрузку в очередь фоновых задач.'
+        )
+
     def handle(self, *args, **options):
-        with open('data/ingredients.csv', encoding='utf-8') as file:
-            file_reader = csv.reader(file, delimiter=',')
-            for row in file_reader:
-                name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit
-                )
+        path = options['path'] and os.path.abspath(options['path'])
+        if options['enqueue']:
+            job = load_ingredients.enqueue(path=path)
+            self.stdout.write(f'Задача #{job.pk} поставлена в очередь.')
+            return
+        load_ingredients(path)
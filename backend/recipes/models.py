@@ -1,15 +1,35 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max
 
 from users.models import User
 from .validators import validate_color
 from foodgram.constants import (MAX_INGREDIENT_MEASUREMENT_UNIT_LENGTH,
                                 MAX_INGREDIENT_NAME_LENGTH,
-                                MAX_RECIPE_NAME_LENGTH, MAX_TAG_COLOR_LENGTH,
-                                MAX_TAG_NAME_LENGTH, MAX_TAG_SLUG_LENGTH,
+                                MAX_RECIPE_NAME_LENGTH, MAX_TAG_BITS,
+                                MAX_TAG_COLOR_LENGTH, MAX_TAG_NAME_LENGTH,
+                                MAX_TAG_SLUG_LENGTH,
                                 MIN_COOKING_TIME_IN_MINUTES,
                                 MIN_INGREDIENTS_AMOUNT)
 
+TAG_IDS_CACHE_KEY = 'tag-ids-by-slug'
+
+
+def get_tag_bit(tag_id):
+    """Бит тега в маске рецепта (0, если тег не помещается в маску)."""
+    if tag_id is None or not 0 < tag_id <= MAX_TAG_BITS:
+        return 0
+    return 1 << (tag_id - 1)
+
+
+def get_tags_mask(tag_ids):
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= get_tag_bit(tag_id)
+    return mask
+
 
 class Ingredient(models.Model):
     """Модель ингредиентов."""
@@ -68,6 +88,40 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if self._state.adding and (
+            Tag.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        ) >= MAX_TAG_BITS:
+            raise ValidationError(self.get_limit_message())
+
+    def save(self, *args, **kwargs):
+        """Тег, id которого не помещается в маску рецепта, не создаётся."""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding and not self.bit:
+                raise ValidationError(self.get_limit_message())
+
+    @staticmethod
+    def get_limit_message():
+        return (
+            f'Id тега должен быть не больше {MAX_TAG_BITS}: '
+            f'больше тегов не помещается в маску рецепта.'
+        )
+
+    @property
+    def bit(self):
+        return get_tag_bit(self.pk)
+
+    @classmethod
+    def get_ids_by_slug(cls):
+        """Соответствие слагов тегов их id (кешируется до изменения тегов)."""
+        ids = cache.get(TAG_IDS_CACHE_KEY)
+        if ids is None:
+            ids = dict(cls.objects.values_list('slug', 'id'))
+            cache.set(TAG_IDS_CACHE_KEY, ids, None)
+        return ids
+
 
 class Recipe(models.Model):
     """Модель рецептов."""
@@ -102,6 +156,11 @@ class Recipe(models.Model):
         Tag,
         verbose_name='Теги'
     )
+    tags_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Битовая маска тегов'
+    )
     cooking_time = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(
             MIN_COOKING_TIME_IN_MINUTES,
@@ -114,6 +173,11 @@ class Recipe(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
 
     class Meta:
         ordering = ('pub_date',)
@@ -123,6 +187,19 @@ class Recipe(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def rebuild_tags_masks(cls, recipe_ids):
+        """Пересчёт масок тегов для рецептов, созданных в обход сигналов."""
+        masks = dict.fromkeys(recipe_ids, 0)
+        for recipe_id, tag_id in cls.tags.through.objects.filter(
+            recipe_id__in=masks
+        ).values_list('recipe_id', 'tag_id'):
+            masks[recipe_id] |= get_tag_bit(tag_id)
+        cls.objects.bulk_update(
+            [cls(pk=pk, tags_mask=mask) for pk, mask in masks.items()],
+            ['tags_mask'],
+        )
+
 
 class IngredientRecipe(models.Model):
     """Связующая модель ингредиентов в рецепте."""
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import TAG_IDS_CACHE_KEY, Recipe, Tag, get_tags_mask
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Синхронизация маски тегов рецепта с таблицей связей."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # Маска считается по таблице связей, а не по полю экземпляра,
+        # которое могло устареть.
+        instance.tags_mask = get_tags_mask(
+            sender.objects.filter(recipe_id=instance.pk).values_list(
+                'tag_id', flat=True
+            )
+        )
+        instance.updated_at = timezone.now()
+        Recipe.objects.filter(pk=instance.pk).update(
+            tags_mask=instance.tags_mask, updated_at=instance.updated_at
+        )
+        return
+    bit = instance.bit
+    if action == 'post_add':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitor(bit), updated_at=timezone.now()
+        )
+    elif action == 'post_remove':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitand(~bit), updated_at=timezone.now()
+        )
+    else:
+        clear_tag_bit(instance)
+
+
+def clear_tag_bit(tag):
+    if tag.bit:
+        Recipe.objects.filter(
+            tags_mask=F('tags_mask').bitor(tag.bit)
+        ).update(
+            tags_mask=F('tags_mask').bitand(~tag.bit),
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_delete, sender=Tag)
+def forget_deleted_tag(sender, instance, **kwargs):
+    clear_tag_bit(instance)
+    cache.delete(TAG_IDS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Tag)
+def reset_tag_ids_cache(sender, **kwargs):
+    cache.delete(TAG_IDS_CACHE_KEY)
@@ -0,0 +1,22 @@
+import csv
+
+from django.conf import settings
+
+from jobs.queue import task
+from recipes.models import Ingredient
+
+
+@task('recipes.load_ingredients')
+def load_ingredients(path=None):
+    """Загрузка ингредиентов из csv файла."""
+    with open(
+        path or settings.BASE_DIR / 'data' / 'ingredients.csv',
+        encoding='utf-8'
+    ) as file:
+        file_reader = csv.reader(file, delimiter=',')
+        for row in file_reader:
+            name, measurement_unit = row
+            Ingredient.objects.get_or_create(
+                name=name,
+                measurement_unit=measurement_unit
+            )
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe
+from users.models import User
+
+OLD = time.time() - 48 * 3600
+# Имена подобраны так, чтобы порядок строк отличался от порядка обхода
+# каталогов и от сортировки без учёта регистра.
+REFERENCED = (
+    'recipes/images/B.png',
+    'recipes/images/a/soup.png',
+    'recipes/images/a-b.png',
+)
+UNUSED = (
+    'recipes/images/a.png',
+    'recipes/images/a/old.png',
+    'recipes/images/b.png',
+)
+
+
+class CollectMediaTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        for name in REFERENCED:
+            Recipe.objects.create(
+                author=author, name='Суп', text='Описание', cooking_time=10,
+                image=name,
+            )
+        for name in REFERENCED + UNUSED:
+            self.make_file(name, OLD)
+
+    def make_file(self, name, mtime):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'image')
+        os.utime(path, (mtime, mtime))
+
+    def existing(self):
+        return {
+            name for name in REFERENCED + UNUSED + ('recipes/images/new.png',)
+            if os.path.exists(os.path.join(self.media_root, name))
+        }
+
+    def collect(self, *args):
+        stdout = StringIO()
+        call_command(
+            'collect_media', '--chunk-size', '1', *args, stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def test_only_unused_files_are_deleted(self):
+        output = self.collect()
+        self.assertEqual(self.existing(), set(REFERENCED))
+        self.assertIn('Проверено файлов старше срока: 6', output)
+        self.assertIn('Удалено неиспользуемых: 3', output)
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.collect('--dry-run')
+        self.assertEqual(self.existing(), set(REFERENCED + UNUSED))
+        for name in UNUSED:
+            self.assertIn(f'Будет удалён {name}', output)
+        for name in REFERENCED:
+            self.assertNotIn(name, output)
+
+    def test_new_files_are_kept(self):
+        self.make_file('recipes/images/new.png', time.time())
+        self.collect()
+        self.assertIn('recipes/images/new.png', self.existing())
+        self.collect('--grace-hours', '0')
+        self.assertEqual(self.existing(), set(REFERENCED))
@@ -0,0 +1,55 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from api.services.conditional import get_version_key
+from outbox.models import ChangeEvent
+from recipes.models import (TAG_IDS_CACHE_KEY, Favorite, Ingredient, Recipe,
+                            Tag)
+
+
+class GenerateDataTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def generate(self, *args):
+        call_command(
+            'generate_data', '--users', '4', '--recipes', '6', *args,
+            stdout=StringIO(),
+        )
+
+    def test_tags_filter_works_after_generation(self):
+        # Закешированное до генерации отсутствие тегов.
+        self.assertEqual(Tag.get_ids_by_slug(), {})
+        self.generate()
+        self.assertIn('lunch', Tag.get_ids_by_slug())
+        self.assertIsNotNone(cache.get(get_version_key('tags')))
+        response = self.client.get('/api/recipes/', {'tags': 'lunch'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_tag_limit_is_checked(self):
+        with mock.patch('recipes.models.MAX_TAG_BITS', 2):
+            with self.assertRaises(CommandError):
+                self.generate()
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_no_change_events(self):
+        self.generate('--favorites', '3', '--subscriptions', '2')
+        self.generate('--favorites', '3', '--subscriptions', '2', '--reset')
+        self.assertTrue(Favorite.objects.exists())
+        self.assertFalse(ChangeEvent.objects.exists())
+
+    def test_reset_clears_tag_caches(self):
+        self.generate()
+        cache.set(TAG_IDS_CACHE_KEY, {}, None)
+        cache.delete(get_version_key('tags'))
+        self.generate('--reset')
+        self.assertIn('lunch', Tag.get_ids_by_slug())
+        self.assertIsNotNone(cache.get(get_version_key('tags')))
+        self.assertEqual(Recipe.objects.count(), 6)
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.services.conditional import get_version_key
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from users.models import User
+
+
+def make_line(number, email='cook@example.com', username='cook',
+              tag=('Завтрак', 'breakfast')):
+    return {
+        'id': number,
+        'author': {
+            'email': email, 'username': username,
+            'first_name': 'Имя', 'last_name': 'Фамилия',
+        },
+        'name': f'Рецепт {number}',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': 'recipes/images/soup.png',
+        'pub_date': '2024-01-01T10:00:00+00:00',
+        'tags': [{'name': tag[0], 'color': '#E26C2D', 'slug': tag[1]}],
+        'ingredients': [
+            {'name': 'соль', 'measurement_unit': 'г', 'amount': 5},
+        ],
+    }
+
+
+class ImportRecipesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.stderr = StringIO()
+
+    def run_import(self, *items):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', delete=False, encoding='utf-8'
+        ) as file:
+            file.writelines(
+                json.dumps(item, ensure_ascii=False) + '\n' for item in items
+            )
+        self.addCleanup(os.remove, file.name)
+        call_command(
+            'import_recipes', input=file.name, batch_size=2,
+            stdout=StringIO(), stderr=self.stderr,
+        )
+
+    def test_import(self):
+        self.run_import(make_line(1), make_line(2), make_line(3))
+        self.assertEqual(
+            list(Recipe.objects.order_by('pk').values_list('name', flat=True)),
+            ['Рецепт 1', 'Рецепт 2', 'Рецепт 3'],
+        )
+        tag = Tag.objects.get(slug='breakfast')
+        self.assertEqual(
+            set(Recipe.objects.values_list('tags_mask', flat=True)),
+            {tag.bit},
+        )
+        self.assertEqual(
+            IngredientRecipe.objects.filter(
+                ingredient=Ingredient.objects.get(name='соль')
+            ).count(),
+            3,
+        )
+        for recipe in Recipe.objects.all():
+            self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(self.stderr.getvalue(), '')
+
+    def test_conflicting_tag_is_reported(self):
+        Tag.objects.create(name='Завтрак', slug='morning', color='#FFFFFF')
+        self.run_import(make_line(1), make_line(2, tag=('Обед', 'lunch')))
+        self.assertEqual(
+            list(Recipe.objects.values_list('name', flat=True)),
+            ['Рецепт 2'],
+        )
+        self.assertIn('Строка 1', self.stderr.getvalue())
+        self.assertIn('breakfast', self.stderr.getvalue())
+
+    def test_conflicting_username_is_reported(self):
+        User.objects.create_user(
+            username='cook', email='other@example.com', password='pass-123'
+        )
+        self.run_import(
+            make_line(1), make_line(2, 'chef@example.com', 'chef')
+        )
+        self.assertEqual(
+            list(Recipe.objects.values_list('author__username', flat=True)),
+            ['chef'],
+        )
+        self.assertIn('Строка 1', self.stderr.getvalue())
+
+    def test_import_resets_facets(self):
+        Tag.objects.create(name='Завтрак', slug='breakfast', color='#FFFFFF')
+        cache.clear()
+        self.run_import(make_line(1))
+        self.assertIsNotNone(cache.get(get_version_key('facets')))
@@ -0,0 +1,77 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from foodgram.constants import MAX_TAG_BITS
+from recipes.models import Recipe, Tag, get_tags_mask
+from users.models import User
+
+
+class TagsMaskTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author, name='Суп', text='Описание', cooking_time=10,
+            image='recipes/images/soup.png',
+        )
+        cls.tags = [
+            Tag.objects.create(name=name, slug=name, color='#FFFFFF')
+            for name in ('breakfast', 'lunch', 'dinner')
+        ]
+
+    def get_mask(self):
+        return Recipe.objects.values_list('tags_mask', flat=True).get(
+            pk=self.recipe.pk
+        )
+
+    def test_add_remove_clear(self):
+        breakfast, lunch, dinner = self.tags
+        self.recipe.tags.add(breakfast, lunch)
+        self.assertEqual(self.get_mask(), breakfast.bit | lunch.bit)
+        self.recipe.tags.remove(breakfast)
+        self.assertEqual(self.get_mask(), lunch.bit)
+        self.recipe.tags.set([dinner])
+        self.assertEqual(self.get_mask(), dinner.bit)
+        self.recipe.tags.clear()
+        self.assertEqual(self.get_mask(), 0)
+
+    def test_stale_instance(self):
+        breakfast, lunch, _ = self.tags
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        self.recipe.tags.add(breakfast)
+        stale.tags.add(lunch)
+        self.assertEqual(self.get_mask(), breakfast.bit | lunch.bit)
+        stale.tags.remove(lunch)
+        self.assertEqual(self.get_mask(), breakfast.bit)
+
+    def test_reverse_changes(self):
+        breakfast, lunch, _ = self.tags
+        self.recipe.tags.add(lunch)
+        breakfast.recipe_set.add(self.recipe)
+        self.assertEqual(self.get_mask(), breakfast.bit | lunch.bit)
+        lunch.recipe_set.clear()
+        self.assertEqual(self.get_mask(), breakfast.bit)
+
+    def test_deleted_tag_leaves_mask(self):
+        breakfast, lunch, _ = self.tags
+        self.recipe.tags.add(breakfast, lunch)
+        breakfast.delete()
+        self.assertEqual(self.get_mask(), lunch.bit)
+
+    def test_tag_limit(self):
+        Tag.objects.create(
+            pk=MAX_TAG_BITS, name='last', slug='last', color='#FFFFFF'
+        )
+        extra = Tag(name='extra', slug='extra', color='#FFFFFF')
+        with self.assertRaises(ValidationError):
+            extra.full_clean()
+        with self.assertRaises(ValidationError):
+            extra.save()
+        self.assertFalse(Tag.objects.filter(slug='extra').exists())
+        self.assertEqual(
+            get_tags_mask([MAX_TAG_BITS + 1, self.tags[0].pk]),
+            self.tags[0].bit,
+        )
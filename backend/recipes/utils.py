@@ -0,0 +1,29 @@
+from django.db import connections, router, transaction
+
+
+def bulk_create_returning_ids(model, objects):
+    """
+    Пакетное создание объектов с заполнением первичных ключей.
+
+    Если база не умеет возвращать id из пакетной вставки (SQLite
+    в Django 3.2), id читаются после вставки: в транзакции после
+    первого INSERT база заблокирована для других записей, поэтому
+    последние len(objects) строк таблицы - только что вставленные,
+    в том же порядке.
+    """
+    db = router.db_for_write(model)
+    if connections[db].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(db).bulk_create(objects)
+    objects = list(objects)
+    if not objects:
+        return objects
+    with transaction.atomic(using=db):
+        model.objects.using(db).bulk_create(objects)
+        ids = list(model.objects.using(db).order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(objects)])
+    for obj, pk in zip(objects, reversed(ids)):
+        obj.pk = pk
+        obj._state.adding = False
+        obj._state.db = db
+    return objects
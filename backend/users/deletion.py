@@ -0,0 +1,97 @@
+import time
+
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from foodgram.constants import DELETION_BATCH_SIZE
+from outbox.models import ChangeEvent
+from outbox.recorder import explicit_recording, make_events, record_many
+from recipes.models import Favorite, IngredientRecipe, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+
+def delete_in_batches(queryset, batch_size, pause=0):
+    """
+    Удаление строк выборки пачками по batch_size, каждая пачка в своей
+    короткой транзакции. Возвращает количество удалённых строк.
+
+    События журнала изменений для рецептов и их ингредиентов
+    записываются одним INSERT на пачку, для связей - триггерами базы.
+    Остальные обработчики post_delete (отзыв токенов, сброс счётчиков)
+    вызываются для каждой строки моделей, у которых они есть.
+    """
+    total = 0
+    queryset = queryset.order_by()
+    while True:
+        with transaction.atomic(), explicit_recording():
+            batch = list(queryset[:batch_size])
+            if not batch:
+                return total
+            queryset.model.objects.filter(
+                pk__in=[obj.pk for obj in batch]
+            ).delete()
+            record_many(make_events(batch, ChangeEvent.DELETE))
+        total += len(batch)
+        if pause:
+            time.sleep(pause)
+
+
+def deactivate_user(user_id):
+    """
+    Деактивация через save(), чтобы сработали обработчики post_save:
+    кеш токенов пользователя сбрасывается сразу. Возвращает False,
+    если пользователя нет.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return False
+    if user.is_active:
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+    return True
+
+
+def delete_user_data(user_id, batch_size=DELETION_BATCH_SIZE, pause=0,
+                     progress=None):
+    """
+    Удаление пользователя и всех зависимых строк ограниченными пачками
+    вместо одного каскадного удаления, которое держит блокировки
+    на время всей операции.
+
+    Пользователь сначала деактивируется. progress(название, удалено)
+    вызывается после каждой группы строк.
+    """
+    if not deactivate_user(user_id):
+        return
+
+    def delete(name, queryset):
+        deleted = delete_in_batches(queryset, batch_size, pause)
+        if progress is not None:
+            progress(name, deleted)
+
+    delete('токены', Token.objects.filter(user_id=user_id))
+    delete('избранное', Favorite.objects.filter(user_id=user_id))
+    delete('списки покупок', ShoppingCart.objects.filter(user_id=user_id))
+    delete('подписки', Subscription.objects.filter(user_id=user_id))
+    delete('подписчики', Subscription.objects.filter(author_id=user_id))
+    recipes = Recipe.objects.filter(author_id=user_id).order_by('pk')
+    while True:
+        ids = list(recipes.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        delete('избранное с рецептами', Favorite.objects.filter(
+            recipe_id__in=ids
+        ))
+        delete('списки покупок с рецептами', ShoppingCart.objects.filter(
+            recipe_id__in=ids
+        ))
+        delete('ингредиенты рецептов', IngredientRecipe.objects.filter(
+            recipe_id__in=ids
+        ))
+        delete('теги рецептов', Recipe.tags.through.objects.filter(
+            recipe_id__in=ids
+        ))
+        delete('рецепты', Recipe.objects.filter(pk__in=ids))
+    delete_in_batches(User.objects.filter(pk=user_id), batch_size)
+    if progress is not None:
+        progress('пользователь', 1)
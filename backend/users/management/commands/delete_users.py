@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.constants import DELETION_BATCH_SIZE
+from users.deletion import delete_user_data
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление пользователей со всеми рецептами, подписками, избранным '
+        'и списками покупок короткими транзакциями по пачкам строк.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument(
+            '--inactive', action='store_true',
+            help='Удалить всех деактивированных пользователей.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETION_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками, с.'
+        )
+
+    def handle(self, *args, **options):
+        ids = list(options['ids'])
+        if options['inactive']:
+            ids += User.objects.filter(is_active=False).values_list(
+                'pk', flat=True
+            )
+        if not ids:
+            raise CommandError(
+                'Укажите id пользователей или параметр --inactive.'
+            )
+        for user_id in ids:
+            started = time.monotonic()
+            self.stdout.write(f'Пользователь #{user_id}:')
+            delete_user_data(
+                user_id,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                progress=self.report,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Пользователь #{user_id} удалён за '
+                f'{time.monotonic() - started:.1f} с.'
+            ))
+
+    def report(self, name, deleted):
+        if deleted:
+            self.stdout.write(f'  удалено {name}: {deleted}')
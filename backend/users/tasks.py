@@ -0,0 +1,20 @@
+import logging
+
+from jobs.queue import task
+from users.deletion import delete_user_data
+from users.models import User
+
+logger = logging.getLogger('foodgram.jobs')
+
+
+@task('users.delete_user')
+def delete_user(user_id):
+    """Удаление деактивированного пользователя со всеми его данными."""
+    if not User.objects.filter(pk=user_id, is_active=False).exists():
+        return
+    delete_user_data(
+        user_id,
+        progress=lambda name, deleted: logger.info(
+            'Пользователь #%s: удалено %s - %s', user_id, name, deleted
+        ),
+    )
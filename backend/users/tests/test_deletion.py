@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from outbox.models import ChangeEvent
+from outbox.recorder import RECIPE_TAGS
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.deletion import (deactivate_user, delete_in_batches,
+                            delete_user_data)
+from users.models import Subscription, User
+
+
+class DeleteUserDataTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='pass-123'
+        )
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass-123'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        tag = Tag.objects.create(name='Обед', slug='lunch', color='#FFFFFF')
+        ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=self.user, name=f'Суп {number}', text='Описание',
+                cooking_time=10, image='recipes/images/soup.png',
+            )
+            recipe.tags.add(tag)
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=5
+            )
+            Favorite.objects.create(user=self.reader, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        Subscription.objects.create(user=self.reader, author=self.user)
+
+    def test_deactivation_rejects_cached_token(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.assertTrue(deactivate_user(self.user.pk))
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_missing_user(self):
+        self.assertFalse(deactivate_user(0))
+        delete_user_data(0)
+
+    def test_delete(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        ChangeEvent.objects.all().delete()
+        progress = []
+        delete_user_data(
+            self.user.pk, batch_size=2,
+            progress=lambda name, deleted: progress.append((name, deleted)),
+        )
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Favorite.objects.exists())
+        self.assertFalse(Subscription.objects.exists())
+        self.assertIn(('рецепты', 2), progress)
+        self.assertIn(('рецепты', 1), progress)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+        events = ChangeEvent.objects.filter(operation=ChangeEvent.DELETE)
+        self.assertEqual(
+            sorted(events.values_list('model', flat=True)),
+            sorted(
+                ['recipes.favorite'] * 3
+                + ['recipes.shoppingcart']
+                + ['users.subscription']
+                + ['recipes.ingredientrecipe'] * 3
+                + [RECIPE_TAGS] * 3
+                + ['recipes.recipe'] * 3
+            ),
+        )
+        self.assertFalse(ChangeEvent.objects.exclude(
+            operation=ChangeEvent.DELETE
+        ).exists())
+
+    def test_events_in_one_insert_per_batch(self):
+        # На пачку: точка сохранения, выборка пачки, выборка перед
+        # удалением, DELETE, один INSERT событий и освобождение точки.
+        with self.assertNumQueries(6 * 2 + 3):
+            self.assertEqual(delete_in_batches(
+                IngredientRecipe.objects.all(), batch_size=2
+            ), 3)
+        self.assertEqual(ChangeEvent.objects.filter(
+            model='recipes.ingredientrecipe', operation=ChangeEvent.DELETE
+        ).count(), 3)
+
+    def test_relation_events_from_triggers(self):
+        favorites = Favorite.objects.filter(user=self.reader)
+        # Связи удаляются без выборки перед удалением, события
+        # записывает триггер.
+        with self.assertNumQueries(4 * 2 + 3):
+            self.assertEqual(delete_in_batches(favorites, batch_size=2), 3)
+        self.assertEqual(ChangeEvent.objects.filter(
+            model='recipes.favorite', operation=ChangeEvent.DELETE
+        ).count(), 3)